@@ -0,0 +1,99 @@
+"""Voorberekende kengetallen per niveau van de gebiedsindeling.
+
+`INDELING_BUURT.csv` deelt Amsterdam in van stadsdeel via gebied en wijk
+tot buurt. Voor elk niveau en elke indicator bevat de tabel het gemiddelde,
+de mediaan, het naar oppervlakte gewogen gemiddelde en het aantal buurten
+met een waarde, plus de vereenvoudigde geometrie van het gebied. De app
+leest alleen de rijen van één niveau: een grafiek of kaart kost dan een
+bewerking per gebied in plaats van een nieuwe groupby over alle buurten.
+"""
+
+import geopandas as gpd  # type: ignore
+import pandas as pd
+
+from geometry import simplify_for_zoom
+
+# Niveaus van groot naar klein: niveau -> (codekolom, naamkolom)
+LEVELS = {
+    "Stadsdeel": ("Stadsdeelcode", "Stadsdeel"),
+    "Gebied": ("Gebiedcode", "Gebied"),
+    "Wijk": ("Wijkcode", "Wijk"),
+    "Buurt": ("Buurtcode", "Buurt"),
+}
+
+INDICATORS = [
+    "Duurzaamheidsindex",
+    "Aanbod groen (1-10)",
+    "aardgasvrije woningequivalenten",
+    "aantal_zonnepanelen",
+    "hoeveelheid_wp_energie",
+]
+
+# Kengetal -> omschrijving in de app
+STATISTICS = {
+    "mean": "Gemiddelde",
+    "median": "Mediaan",
+    "wmean": "Gemiddelde naar oppervlakte",
+    "count": "Aantal buurten",
+}
+
+# Zoomniveau waarvoor de geometrie van de gebieden wordt vereenvoudigd
+AGGREGATE_ZOOM = 12
+
+
+def statistic_column(indicator, statistic):
+    """Kolomnaam van een kengetal in de tabel, bijvoorbeeld `Duurzaamheidsindex_wmean`."""
+    return f"{indicator}_{statistic}"
+
+
+def fill_hierarchy(gdf):
+    """Vult ontbrekende codes en namen van de gebiedsindeling aan, zodat geen buurt buiten een niveau valt.
+
+    Een ontbrekende code wordt de naam van het gebied, of anders de code
+    van het bovenliggende niveau; een ontbrekende naam wordt die van het
+    bovenliggende niveau. Westpoort heeft zo één gebied, Westpoort (B).
+    """
+    gdf = gdf.copy()
+    parent = None
+    for code, name in LEVELS.values():
+        gdf[code] = gdf[code].astype(object)
+        gdf[name] = gdf[name].astype(object)
+        if parent is not None:
+            parent_code, parent_name = parent
+            gdf[code] = gdf[code].fillna(gdf[name]).fillna(gdf[parent_code])
+            gdf[name] = gdf[name].fillna(gdf[parent_name])
+        parent = code, name
+    return gdf
+
+
+def _aggregate_level(gdf, level):
+    """Kengetallen en geometrie voor één niveau, met de codes en namen van de bovenliggende niveaus."""
+    code, name = LEVELS[level]
+    parents = [column for lvl in LEVELS for column in LEVELS[lvl]]
+    parents = parents[:parents.index(code)]
+
+    groups = gdf.groupby(code, sort=True, observed=True)
+    frame = groups[[name, *parents]].first()
+    frame[name] = frame[name].astype(str)
+    area = gdf["Oppervlakte_m2"].astype(float)
+    for indicator in INDICATORS:
+        values = gdf[indicator].astype(float)
+        stats = groups[indicator].agg(["mean", "median", "count"])
+        weighted = (values * area).groupby(gdf[code], observed=True).sum(min_count=1)
+        weights = area.where(values.notna()).groupby(gdf[code], observed=True).sum(min_count=1)
+        stats["wmean"] = weighted / weights
+        for statistic in STATISTICS:
+            frame[statistic_column(indicator, statistic)] = stats[statistic]
+
+    geometry = gdf[[code, "geometry"]].dissolve(by=code, method="coverage").geometry.reindex(frame.index)
+    frame = gpd.GeoDataFrame(frame, geometry=simplify_for_zoom(geometry.values, AGGREGATE_ZOOM), crs=gdf.crs)
+    frame = frame.reset_index().rename(columns={code: "code", name: "naam"})
+    frame.insert(0, "niveau", level)
+    return frame
+
+
+def build_aggregates(gdf):
+    """De tabel voor alle niveaus, één rij per gebied; elke buurt telt op elk niveau mee."""
+    gdf = fill_hierarchy(gdf)
+    frames = [_aggregate_level(gdf, level) for level in LEVELS]
+    return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,235 @@
+"""Benchmarks van het inlezen en van de kaart- en figuurbouwers van de app.
+
+Elke meting draait de bouwer zonder Streamlit en zonder de caches van de
+app: het bestand wordt opnieuw geparsed, de HTML opnieuw gerenderd en de
+clustering opnieuw gefit. Per bouwer en datagrootte worden vastgelegd:
+
+- `seconds`: de mediaan van de wandkloktijd over `--repeat` runs;
+- `peak_mb`: het piekgeheugen volgens `tracemalloc`, in een aparte run;
+- `bytes`: de grootte van de geserialiseerde HTML (kaarten) of PNG (figuren).
+
+Naast de echte 518 buurten wordt gemeten op synthetische sets van 5.000
+en 15.000 buurten: kopieën van de stad, naast elkaar verschoven, met eigen
+buurtcodes.
+
+Gebruik:
+
+    python benchmark.py                                  # schrijft benchmark.json
+    python benchmark.py --sizes 518 --repeat 1 heat_map  # één bouwer, alleen de echte data
+    python benchmark.py --baseline benchmark_baseline.json
+
+Met `--baseline` wordt elke meting vergeleken met dezelfde meting uit dat
+bestand; ligt een waarde meer dan de drempel in `THRESHOLDS` hoger, dan
+eindigt het script met exitcode 1.
+"""
+
+import argparse
+import io
+import json
+import math
+import os
+import platform
+import statistics
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import geopandas as gpd  # type: ignore
+import pandas as pd
+
+import clustering
+from figures import correlation_figure, histogram_figure, stadsdeel_figure
+from loaders import clear_cache, read_buurten, read_energielabels, read_geoparquet
+from maps import (
+    DEFAULT_ZOOM, aardgasvrij_map, cluster_map, comparison_map, energielabel_map, groen_map, groen_marker_map,
+    heat_map, index_map, with_zoom_geometry,
+)
+
+OUTPUT_PATH = "benchmark.json"
+
+SIZES = [518, 5_000, 15_000]
+
+# Toegestane verhouding ten opzichte van de baseline, per meetwaarde
+THRESHOLDS = {"seconds": 1.25, "peak_mb": 1.25, "bytes": 1.10}
+
+
+def replicate(gdf, n_rows):
+    """`gdf` met precies `n_rows` buurten: kopieën van de stad, telkens één stadsbreedte naar het oosten.
+
+    De kopieën krijgen de vereenvoudigde geometrie van `DEFAULT_ZOOM` en
+    Buurtcode `<code>-<kopie>`. Bij `n_rows` <= de echte grootte blijft de
+    echte data staan.
+    """
+    if n_rows <= len(gdf):
+        return gdf.iloc[:n_rows]
+    base = with_zoom_geometry(gdf, DEFAULT_ZOOM)
+    xmin, _, xmax, _ = base.total_bounds
+    width = (xmax - xmin) * 1.05
+    parts = []
+    for k in range(math.ceil(n_rows / len(base))):
+        part = base.copy()
+        if k:
+            part = part.set_geometry(part.geometry.translate(xoff=k * width))
+            part["Buurtcode"] = part["Buurtcode"].astype(str) + f"-{k}"
+            if "LNG" in part:
+                part["LNG"] = part["LNG"] + k * width
+        parts.append(part)
+    return gpd.GeoDataFrame(pd.concat(parts, ignore_index=True), crs=gdf.crs).iloc[:n_rows]
+
+
+def dataset(n_rows):
+    """Buurten en energielabels voor `n_rows` buurten; de labels horen bij dezelfde (kopie)buurten."""
+    buurten = replicate(read_buurten(), n_rows)
+    labels = read_energielabels()
+    copies = math.ceil(n_rows / len(read_buurten()))
+    labels = replicate(labels, len(labels) * copies) if copies > 1 else labels
+    return buurten, labels[labels["Buurtcode"].isin(buurten["Buurtcode"])].reset_index(drop=True)
+
+
+@contextmanager
+def cold_clustering():
+    """Fit de clustering echt, zonder de `joblib`-cache op schijf."""
+    cached = clustering.fit_clusters
+    clustering.fit_clusters = cached.func
+    try:
+        yield
+    finally:
+        clustering.fit_clusters = cached
+
+
+def _map_html(m):
+    return m.get_root().render().encode()
+
+
+def _figure_png(fig):
+    import matplotlib.pyplot as plt
+
+    try:
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format="png", dpi=100, bbox_inches="tight")
+    finally:
+        plt.close(fig)
+    return buffer.getvalue()
+
+
+def _stadsdeel_png():
+    """De stadsdeelgrafiek leest de kengetallen zelf; die worden opnieuw geparsed.
+
+    Er zijn altijd evenveel stadsdelen, dus deze meting hangt niet af van
+    de datagrootte.
+    """
+    clear_cache()
+    return _figure_png(stadsdeel_figure())
+
+
+def _load(path):
+    """Parseert het bestand opnieuw; de uitvoergrootte is dan die van het bestand."""
+    clear_cache()
+    read_geoparquet(path)
+
+
+# Naam -> functie (buurten, energielabels, parquetbestand) -> geserialiseerde uitvoer (bytes) of None
+CASES = {
+    "data_load": lambda buurten, labels, path: _load(path),
+    "index_map": lambda buurten, labels, path: _map_html(index_map(buurten)),
+    "heat_map": lambda buurten, labels, path: _map_html(heat_map(buurten)),
+    "cluster_map": lambda buurten, labels, path: _map_html(cluster_map(buurten, n_clusters=8)),
+    "groen_marker_map": lambda buurten, labels, path: _map_html(groen_marker_map(buurten)),
+    "groen_map": lambda buurten, labels, path: _map_html(groen_map(buurten)),
+    "aardgasvrij_map": lambda buurten, labels, path: _map_html(aardgasvrij_map(buurten)),
+    "energielabel_map": lambda buurten, labels, path: _map_html(energielabel_map(labels)),
+    "comparison_map": lambda buurten, labels, path: _map_html(comparison_map(buurten, labels)),
+    "stadsdeel_figure": lambda buurten, labels, path: _stadsdeel_png(),
+    "histogram_figure": lambda buurten, labels, path: _figure_png(histogram_figure(buurten)),
+    "correlation_figure": lambda buurten, labels, path: _figure_png(correlation_figure(buurten)),
+}
+
+
+def measure(case, buurten, labels, path, repeat=3):
+    """Mediaan van de tijd, piekgeheugen en uitvoergrootte van één bouwer op één dataset."""
+    run = CASES[case]
+    times = []
+    with cold_clustering():
+        for _ in range(repeat):
+            start = time.perf_counter()
+            output = run(buurten, labels, path)
+            times.append(time.perf_counter() - start)
+
+        tracemalloc.start()
+        try:
+            run(buurten, labels, path)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return {
+        "seconds": round(statistics.median(times), 4),
+        "peak_mb": round(peak / 2**20, 2),
+        "bytes": len(output) if output is not None else os.path.getsize(path),
+    }
+
+
+def run_benchmarks(cases=None, sizes=SIZES, repeat=3):
+    """Meet alle `cases` op alle `sizes` en levert elk resultaat op zodra het er is."""
+    cases = cases or list(CASES)
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_rows in sizes:
+            buurten, labels = dataset(n_rows)
+            path = os.path.join(tmp, f"buurten_{n_rows}.parquet")
+            buurten.to_parquet(path, index=False)
+            for case in cases:
+                yield {"case": case, "rows": n_rows, **measure(case, buurten, labels, path, repeat)}
+
+
+def compare(results, baseline, thresholds=THRESHOLDS):
+    """Meetwaarden die boven baseline x drempel liggen, als (case, rows, meetwaarde, nu, baseline)."""
+    previous = {(r["case"], r["rows"]): r for r in baseline["results"]}
+    regressions = []
+    for result in results:
+        before = previous.get((result["case"], result["rows"]))
+        if before is None:
+            continue
+        for metric, factor in thresholds.items():
+            if before[metric] and result[metric] > before[metric] * factor:
+                regressions.append((result["case"], result["rows"], metric, result[metric], before[metric]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Meet tijd, geheugen en uitvoergrootte van de bouwers van de app.")
+    parser.add_argument("cases", nargs="*", help="bouwers om te meten: " + ", ".join(CASES))
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="aantallen buurten")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per meting voor de tijd")
+    parser.add_argument("--out", default=OUTPUT_PATH, help=f"resultaatbestand (standaard: {OUTPUT_PATH})")
+    parser.add_argument("--baseline", help="eerder resultaatbestand om mee te vergelijken")
+    args = parser.parse_args(argv)
+    unknown = [case for case in args.cases if case not in CASES]
+    if unknown:
+        parser.error("onbekende bouwer(s): " + ", ".join(unknown))
+
+    results = []
+    for result in run_benchmarks(args.cases, args.sizes, args.repeat):
+        results.append(result)
+        print(f"{result['case']:<20} {result['rows']:>6}  {result['seconds']:8.3f}s "
+              f"{result['peak_mb']:8.1f} MB {result['bytes'] / 1024:9.0f} KB")
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "thresholds": THRESHOLDS,
+        "results": results,
+    }
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=1)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f))
+        for case, rows, metric, now, before in regressions:
+            print(f"Regressie: {case} ({rows} buurten) {metric} {now} tegen {before}")
+        if regressions:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Verbinding tussen de gecachte kaarten en Python.
+
+De kaarten worden als vaste HTML in een iframe getoond (zie
+`maps.map_html`). Gegevens gaan daarom via `postMessage`: twee kleine
+Streamlit-componenten op de pagina sturen kleuren naar de kaarten
+(`ColorReceiver`) en geven klikken op de kaart (`ClickSender`) door aan
+Python. De kaart zelf wordt daarbij nooit opnieuw geladen.
+"""
+
+import numpy as np
+import pandas as pd
+import streamlit as st  # type: ignore
+
+# Stuurt de kleuren door naar elke kaart op de pagina met een `ColorReceiver`.
+# Een kaart die later laadt, vraagt zelf om de laatste kleuren.
+_PUSH_COLORS_JS = """
+export default function (component) {
+    window.buurtColors = component.data;
+    if (!window.buurtColorsListener) {
+        window.buurtColorsListener = function (event) {
+            if (event.data && event.data.type === "buurt-map-ready" && window.buurtColors) {
+                event.source.postMessage({type: "buurt-colors", colors: window.buurtColors}, "*");
+            }
+        };
+        window.addEventListener("message", window.buurtColorsListener);
+    }
+    document.querySelectorAll("iframe").forEach(function (frame) {
+        frame.contentWindow.postMessage({type: "buurt-colors", colors: component.data}, "*");
+    });
+}
+"""
+
+_push_colors = st.components.v2.component("buurt_colors", js=_PUSH_COLORS_JS)
+
+
+def push_colors(codes, colors, key="buurt_colors"):
+    """Stuurt Buurtcode -> kleur naar de kaarten op de pagina, zonder ze te herladen."""
+    _push_colors(data=dict(zip(pd.Series(codes).astype(str), np.asarray(colors).tolist())), key=key)
+
+
+_CLICKS_JS = """
+export default function (component) {
+    if (window.buurtClickListener) {
+        window.removeEventListener("message", window.buurtClickListener);
+    }
+    window.buurtClickListener = function (event) {
+        if (event.data && event.data.type === "buurt-click") {
+            component.setStateValue("clicked", {lat: event.data.lat, lng: event.data.lng});
+        }
+    };
+    window.addEventListener("message", window.buurtClickListener);
+}
+"""
+
+_clicks = st.components.v2.component("buurt_clicks", js=_CLICKS_JS)
+
+
+def last_click(key="buurt_clicks"):
+    """De laatst aangeklikte plek op een kaart met `ClickSender`, als (lat, lng), of None."""
+    clicked = _clicks(key=key, on_clicked_change=lambda: None).clicked
+    if not clicked:
+        return None
+    return clicked["lat"], clicked["lng"]
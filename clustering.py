@@ -0,0 +1,144 @@
+"""Clustering van buurten op duurzaamheidskenmerken, met een cache op schijf.
+
+Het model wordt opgeslagen met `joblib.Memory`, op basis van een hash van
+de kenmerkenmatrix en de instellingen: zolang de data niet verandert,
+wordt er niet opnieuw gefit, ook niet na een herstart van de server.
+
+De legenda in de app beschrijft clusters 0 t/m 7 met de hand, bij de
+oorspronkelijke fit: KMeans op de `output.geojson` van vóór de pipeline,
+met ontbrekende waarden als 0. De centra van die fit staan in
+`clusters_reference.json`. Om de nummering stabiel te houden, worden de
+clustercentra van een nieuwe fit daaraan gekoppeld en worden de labels
+daarnaar hernummerd. De referentie dient ook als startpunt van de fit,
+wat hem snel maakt. De app schrijft de referentie nooit zelf; opnieuw
+maken gaat met
+
+    python clustering.py <oorspronkelijke output.geojson>
+
+scikit-learn en scipy worden pas bij de eerste fit geïmporteerd; alleen
+de clustersectie heeft ze nodig.
+"""
+
+import argparse
+import json
+import os
+
+import joblib
+import numpy as np
+
+CACHE_DIR = ".model_cache"
+REFERENCE_PATH = "clusters_reference.json"
+
+FEATURES = ["Duurzaamheidsindex", "aantal_zonnepanelen", "aardgasvrije woningequivalenten", "Aanbod groen (1-10)"]
+
+# Vanaf dit aantal buurten wordt standaard MiniBatchKMeans gebruikt
+MINI_BATCH_THRESHOLD = 10_000
+
+memory = joblib.Memory(CACHE_DIR, verbose=0)
+
+
+@memory.cache
+def fit_clusters(X, n_clusters=8, random_state=42, method="kmeans", init=None):
+    """Schaalt `X` en fit KMeans of MiniBatchKMeans.
+
+    `init` zijn optionele startcentra in de oorspronkelijke eenheden.
+    Geeft (scaler, model) terug.
+    """
+    from sklearn.cluster import KMeans, MiniBatchKMeans
+    from sklearn.preprocessing import StandardScaler
+
+    scaler = StandardScaler().fit(X)
+    scaled = scaler.transform(X)
+    if init is not None:
+        start, n_init = scaler.transform(init), 1
+    else:
+        start, n_init = "k-means++", "auto"
+    if method == "minibatch":
+        model = MiniBatchKMeans(n_clusters=n_clusters, init=start, n_init=n_init,
+                                random_state=random_state, batch_size=4096)
+    else:
+        model = KMeans(n_clusters=n_clusters, init=start, n_init=n_init, random_state=random_state)
+    model.fit(scaled)
+    return scaler, model
+
+
+def load_reference(path=REFERENCE_PATH):
+    """Referentiecentra (oorspronkelijke eenheden), of None als die er niet is."""
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        reference = json.load(f)
+    if reference["features"] != FEATURES:
+        return None
+    return np.asarray(reference["centers"], dtype=float)
+
+
+def save_reference(centers, path=REFERENCE_PATH):
+    with open(path, "w") as f:
+        json.dump({"features": FEATURES, "centers": np.asarray(centers).tolist()}, f, indent=2)
+
+
+def align_labels(scaler, centers, reference):
+    """Permutatie die elk nieuw cluster op het dichtstbijzijnde referentiecluster legt.
+
+    De afstanden worden gemeten in de geschaalde ruimte, zodat alle
+    kenmerken even zwaar wegen.
+    """
+    from scipy.optimize import linear_sum_assignment  # type: ignore
+    from scipy.spatial.distance import cdist  # type: ignore
+
+    cost = cdist(scaler.transform(centers), scaler.transform(reference))
+    rows, cols = linear_sum_assignment(cost)
+    mapping = np.empty(len(centers), dtype=int)
+    mapping[rows] = cols
+    return mapping
+
+
+def reference_centers(features, n_clusters=8, random_state=42):
+    """Centra van de fit waarop de legenda is geschreven: KMeans op geschaalde kenmerken, ontbrekend = 0."""
+    X = features[FEATURES].fillna(0).to_numpy(dtype=float)
+    scaler, model = fit_clusters.func(X, n_clusters, random_state)
+    return scaler.inverse_transform(model.cluster_centers_)
+
+
+def cluster_labels(features, n_clusters=8, random_state=42, method="auto"):
+    """Clusterlabels per buurt, met stabiele nummering ten opzichte van de referentie.
+
+    `method` is "kmeans", "minibatch" of "auto" (minibatch vanaf
+    `MINI_BATCH_THRESHOLD` buurten). Zonder referentiebestand volgt een
+    `FileNotFoundError`; bij een ander aantal clusters dan de referentie
+    blijven de labels van de fit zelf staan.
+    """
+    X = np.ascontiguousarray(features[FEATURES].to_numpy(dtype=float))
+    if method == "auto":
+        method = "minibatch" if len(X) >= MINI_BATCH_THRESHOLD else "kmeans"
+
+    reference = load_reference()
+    if reference is None:
+        raise FileNotFoundError(
+            f"{REFERENCE_PATH} ontbreekt of hoort bij andere kenmerken; maak hem met `python clustering.py`"
+        )
+    if len(reference) != n_clusters:
+        _, model = fit_clusters(X, n_clusters, random_state, method)
+        return model.labels_
+    scaler, model = fit_clusters(X, n_clusters, random_state, method, reference)
+    centers = scaler.inverse_transform(model.cluster_centers_)
+    return align_labels(scaler, centers, reference)[model.labels_]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Maak de referentiecentra van de clusterlegenda opnieuw.")
+    parser.add_argument("geojson", help="de oorspronkelijke output.geojson, waarop de legenda is geschreven")
+    parser.add_argument("--clusters", type=int, default=8, help="aantal clusters (standaard: 8)")
+    args = parser.parse_args(argv)
+
+    import geopandas as gpd  # type: ignore
+
+    centers = reference_centers(gpd.read_file(args.geojson), args.clusters)
+    save_reference(centers)
+    for k, center in enumerate(centers):
+        print(f"{k}: " + ", ".join(f"{name} {value:.3f}" for name, value in zip(FEATURES, center)))
+
+
+if __name__ == "__main__":
+    main()
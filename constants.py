@@ -0,0 +1,17 @@
+"""Vaste definities van de index, gedeeld door de pipeline en de app."""
+
+# Gewichten van de genormaliseerde componenten in de gepubliceerde index.
+INDEX_WEIGHTS = {
+    "Groeneaanbod_normalized": 0.25,
+    "Aardgasvrije_normalized": 0.25,
+    "Zonnepanelen_normalized": 0.25,
+}
+
+# Indicator -> kolom die aangeeft dat de waarde ontbrak en geschat is met de
+# mediaan van de wijk, het gebied of het stadsdeel (zie pipeline._fill_hierarchical)
+IMPUTED_FLAGS = {
+    "Aanbod groen (1-10)": "groen_imputed",
+    "aardgasvrije woningequivalenten": "aardgasvrij_imputed",
+    "aantal_zonnepanelen": "zonnepanelen_imputed",
+    "hoeveelheid_wp_energie": "wp_energie_imputed",
+}
@@ -0,0 +1,179 @@
+"""Statische export van alle kaarten en figuren van de app, zonder Streamlit.
+
+Dezelfde bouwers als in `Untitled1.py` (maps.py en figures.py). Kaarten
+worden losse HTML-pagina's, matplotlib-figuren PNG en SVG; de plotly-figuur
+wordt een HTML-pagina, want een PNG daarvan vraagt een extra renderer.
+
+Per artefact wordt een stempel bewaard in `<uitvoermap>/export.json`: de
+hash van de invoerbestanden en van de code die het bouwt. Artefacten met
+een ongewijzigde stempel worden overgeslagen; de rest wordt parallel
+gebouwd in een procespool.
+
+Gebruik:
+
+    python export.py                        # alles naar export/
+    python export.py --out rapport correlatie top_15
+    python export.py --force                # negeer de stempels
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Callable
+
+import matplotlib.pyplot as plt
+
+from aggregates import LEVELS
+from clustering import REFERENCE_PATH
+from figures import (
+    correlation_figure, histogram_figure, level_figure, stadsdeel_figure, top_15_figure,
+)
+from loaders import (
+    AGGREGATES_PATH, BUURTEN_PATH, ENERGIELABELS_PATH, GEOMETRY_LOD_PATH, file_digest, read_buurten,
+    read_energielabels,
+)
+from maps import (
+    aardgasvrij_map, cluster_map, comparison_map, energielabel_map, groen_map, groen_marker_map, heat_map, index_map,
+    level_map,
+)
+
+# Geen scherm nodig voor de figuren, ook niet in de werkprocessen
+plt.switch_backend("Agg")
+
+EXPORT_DIR = "export"
+MANIFEST = "export.json"
+
+FIGURE_FORMATS = ("png", "svg")
+
+# Code waarvan elk soort artefact afhangt; een wijziging daarin maakt de stempel ongeldig
+CODE_FILES = {
+    "map": ("maps.py", "constants.py", "geometry.py", "raster.py", "clustering.py", "aggregates.py", "loaders.py"),
+    "figure": ("figures.py", "maps.py", "aggregates.py", "loaders.py"),
+    "plotly": ("figures.py", "loaders.py"),
+}
+
+
+@dataclass
+class Export:
+    kind: str  # "map", "figure" of "plotly"
+    build: Callable
+    files: tuple
+
+
+EXPORTS = {
+    "duurzaamheidsindex": Export("map", lambda: index_map(read_buurten()), (BUURTEN_PATH, GEOMETRY_LOD_PATH)),
+    "zonnepanelen": Export("map", lambda: heat_map(read_buurten()), (BUURTEN_PATH,)),
+    "clusters": Export("map", lambda: cluster_map(read_buurten(), n_clusters=8),
+                       (BUURTEN_PATH, GEOMETRY_LOD_PATH, REFERENCE_PATH)),
+    "groen_markers": Export("map", lambda: groen_marker_map(read_buurten()), (BUURTEN_PATH,)),
+    "groen": Export("map", lambda: groen_map(read_buurten()), (BUURTEN_PATH, GEOMETRY_LOD_PATH)),
+    "aardgasvrij": Export("map", lambda: aardgasvrij_map(read_buurten()), (BUURTEN_PATH, GEOMETRY_LOD_PATH)),
+    "energielabels": Export("map", lambda: energielabel_map(read_energielabels()),
+                            (ENERGIELABELS_PATH, GEOMETRY_LOD_PATH)),
+    "vergelijking": Export("map", lambda: comparison_map(read_buurten(), read_energielabels()),
+                           (BUURTEN_PATH, ENERGIELABELS_PATH, GEOMETRY_LOD_PATH)),
+    "stadsdelen": Export("figure", stadsdeel_figure, (AGGREGATES_PATH,)),
+    "verdeling": Export("figure", lambda: histogram_figure(read_buurten()), (BUURTEN_PATH,)),
+    "correlatie": Export("figure", lambda: correlation_figure(read_buurten()), (BUURTEN_PATH,)),
+    "top_15": Export("plotly", lambda: top_15_figure(read_buurten()), (BUURTEN_PATH,)),
+}
+
+# Per niveau van de gebiedsindeling de kaart en de grafiek van de gemiddelde index
+for _level in LEVELS:
+    if _level == "Buurt":
+        continue
+    EXPORTS[f"gebieden_{_level.lower()}"] = Export(
+        "map", lambda level=_level: level_map(level, "Duurzaamheidsindex"), (AGGREGATES_PATH,))
+    EXPORTS[f"gebieden_{_level.lower()}_grafiek"] = Export(
+        "figure", lambda level=_level: level_figure(level, "Duurzaamheidsindex", "mean"), (AGGREGATES_PATH,))
+
+
+def output_paths(name, out_dir=EXPORT_DIR):
+    """De bestanden die artefact `name` oplevert."""
+    if EXPORTS[name].kind == "figure":
+        return [os.path.join(out_dir, f"{name}.{fmt}") for fmt in FIGURE_FORMATS]
+    return [os.path.join(out_dir, f"{name}.html")]
+
+
+def export_stamp(name):
+    """Hash van de naam, de invoerbestanden en de code van artefact `name`."""
+    e = EXPORTS[name]
+    h = hashlib.blake2b(digest_size=16)
+    h.update(name.encode())
+    for path in (*e.files, *CODE_FILES[e.kind]):
+        h.update(file_digest(path).encode())
+    return h.hexdigest()
+
+
+def export_one(name, out_dir=EXPORT_DIR):
+    """Bouwt en schrijft één artefact; geeft de duur in seconden."""
+    start = time.perf_counter()
+    e = EXPORTS[name]
+    result = e.build()
+    paths = output_paths(name, out_dir)
+    if e.kind == "map":
+        result.get_root().save(paths[0])
+    elif e.kind == "plotly":
+        result.write_html(paths[0], include_plotlyjs="cdn")
+    else:
+        try:
+            for path in paths:
+                result.savefig(path, bbox_inches="tight")
+        finally:
+            plt.close(result)
+    return time.perf_counter() - start
+
+
+def export_all(names=None, out_dir=EXPORT_DIR, workers=None, force=False):
+    """Exporteert `names` (standaard alles) en slaat artefacten met een ongewijzigde stempel over.
+
+    Geeft per artefact (naam, status, seconden).
+    """
+    names = names or list(EXPORTS)
+    os.makedirs(out_dir, exist_ok=True)
+    manifest_path = os.path.join(out_dir, MANIFEST)
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+
+    stamps = {name: export_stamp(name) for name in names}
+    todo = [
+        name for name in names
+        if force or manifest.get(name) != stamps[name]
+        or not all(os.path.exists(path) for path in output_paths(name, out_dir))
+    ]
+    log = [(name, "ongewijzigd", 0.0) for name in names if name not in todo]
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {name: pool.submit(export_one, name, out_dir) for name in todo}
+        for name, future in futures.items():
+            log.append((name, "gebouwd", future.result()))
+            # Na elk artefact bijwerken, zodat een afgebroken run niet alles opnieuw doet
+            manifest[name] = stamps[name]
+            with open(manifest_path, "w") as f:
+                json.dump(manifest, f, indent=1, sort_keys=True)
+    return log
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Exporteer de kaarten en figuren van de app.")
+    parser.add_argument("names", nargs="*", help="artefacten om te exporteren: " + ", ".join(EXPORTS))
+    parser.add_argument("--out", default=EXPORT_DIR, help=f"uitvoermap (standaard: {EXPORT_DIR})")
+    parser.add_argument("--workers", type=int, default=None, help="aantal processen (standaard: alle kernen)")
+    parser.add_argument("--force", action="store_true", help="negeer de stempels en bouw alles opnieuw")
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.names if name not in EXPORTS]
+    if unknown:
+        parser.error("onbekend(e) artefact(en): " + ", ".join(unknown))
+
+    for name, status, seconds in export_all(args.names, args.out, args.workers, args.force):
+        print(f"{name:<28} {status:<12} {seconds:6.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""Figuren van de app: matplotlib/seaborn en plotly.
+
+Los van `Untitled1.py`, zodat ze ook zonder Streamlit gebouwd kunnen
+worden (zie export.py). In de app worden de matplotlib-figuren via
+`figure_png` één keer per dataversie naar PNG gerenderd en direct
+gesloten; elke sessie krijgt daarna dezelfde bytes.
+
+matplotlib, seaborn en plotly worden pas geïmporteerd als een figuur
+gebouwd wordt, niet bij het starten van de app.
+"""
+
+import io
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from aggregates import STATISTICS, statistic_column
+from loaders import read_aggregates
+from maps import select_areas
+
+
+def stadsdeel_figure():
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    # Uit de voorberekende kengetallen, zonder groupby over alle buurten
+    avg_index = read_aggregates("Stadsdeel").set_index("naam")["Duurzaamheidsindex_mean"].sort_values()
+    fig = plt.figure(figsize=(10, 6))
+    sns.barplot(x=avg_index.values, y=avg_index.index, palette="YlGn")
+    return fig
+
+
+def level_figure(level, indicator, statistic, stadsdeel=None, gebied=None):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    column = statistic_column(indicator, statistic)
+    values = select_areas(read_aggregates(level), stadsdeel, gebied).set_index("naam")[column].sort_values()
+    fig = plt.figure(figsize=(10, max(4, 0.25 * len(values))))
+    if values.empty:
+        plt.axis("off")
+        plt.text(0.5, 0.5, "Geen gebieden op dit niveau", ha="center", va="center")
+        return fig
+    sns.barplot(x=values.values, y=values.index, palette="YlGn")
+    plt.xlabel(f"{indicator} ({STATISTICS[statistic].lower()})")
+    plt.ylabel(level)
+    return fig
+
+
+def histogram_figure(gdf):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    fig, ax = plt.subplots(figsize=(10, 6))
+    sns.histplot(gdf["Duurzaamheidsindex"], kde=True, bins=20, color="teal")
+    ax.set_title("Verdeling van de Duurzaamheidsindex", fontsize=16)
+    ax.set_xlabel("Duurzaamheidsindex", fontsize=12)
+    ax.set_ylabel("Aantal buurten", fontsize=12)
+    return fig
+
+
+def correlation_figure(gdf):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    # Correlatiematrix berekenen
+    corr_matrix = gdf[["Duurzaamheidsindex", "aantal_zonnepanelen", "Aanbod groen (1-10)", "aardgasvrije woningequivalenten"]].corr()
+
+    # Mask genereren voor de bovenste driehoek
+    mask = np.triu(np.ones_like(corr_matrix, dtype=bool))
+
+    # Plotten
+    fig, ax = plt.subplots(figsize=(8, 6))
+    sns.heatmap(corr_matrix, mask=mask, annot=True, cmap="coolwarm", fmt=".2f", cbar_kws={'shrink': .8})
+    ax.set_title("Halve Correlatiematrix", fontsize=16)
+    return fig
+
+
+def top_15_figure(gdf):
+    import plotly.graph_objects as go
+    import plotly.subplots as sp
+
+    # Data voorbereiden vanuit jouw GeoDataFrame
+    data = gdf[['Buurt', 'Aanbod groen (1-10)', 'aardgasvrije woningequivalenten', 'aantal_zonnepanelen', 'Duurzaamheidsindex']].copy()
+    # Hernoem kolommen voor betere labels
+    data.rename(columns={
+        'Aanbod groen (1-10)': 'Groene aanbod',
+        'aardgasvrije woningequivalenten': 'Aardgasvrije woningen (%)',
+        'aantal_zonnepanelen': 'Aantal zonnepanelen'
+    }, inplace=True)
+
+    # Sorteer de buurten op de hoogste Duurzaamheidsindex en selecteer de top 20
+    top_15 = data.sort_values(by='Duurzaamheidsindex', ascending=False).head(15)
+
+    # Maak een lege subplot met aparte rijen voor elke indicator
+    fig = sp.make_subplots(
+        rows=3, cols=1,  # 3 subplots in één kolom
+        shared_xaxes=True,  # De x-as wordt gedeeld (Buurt)
+        subplot_titles=('Groene aanbod', 'Aardgasvrije woningen (%)', 'Aantal zonnepanelen')
+    )
+
+    # Voeg Groene aanbod toe aan de eerste subplot
+    fig.add_trace(
+        go.Bar(
+            x=top_15['Buurt'],
+            y=top_15['Groene aanbod'],
+            name='Groene aanbod',
+            marker=dict(color='green')
+        ),
+        row=1, col=1
+    )
+
+    # Voeg Aardgasvrije woningen toe aan de tweede subplot
+    fig.add_trace(
+        go.Bar(
+            x=top_15['Buurt'],
+            y=top_15['Aardgasvrije woningen (%)'],
+            name='Aardgasvrije woningen (%)',
+            marker=dict(color='blue')
+        ),
+        row=2, col=1
+    )
+
+    # Voeg Aantal zonnepanelen toe aan de derde subplot
+    fig.add_trace(
+        go.Bar(
+            x=top_15['Buurt'],
+            y=top_15['Aantal zonnepanelen'],
+            name='Aantal zonnepanelen',
+            marker=dict(color='orange')
+        ),
+        row=3, col=1
+    )
+
+    # Pas de layout aan
+    fig.update_layout(
+        height=1200,  # Hoogte aanpassen voor leesbaarheid
+        showlegend=False,  # Legenda verbergen, niet nodig voor aparte subplots
+        xaxis=dict(title='Buurt')  # Label voor de x-as
+    )
+    return fig
+
+
+# Bovengrens van de PNG-cache (som van de groottes)
+FIGURE_CACHE_BYTES = 16 * 1024 * 1024
+
+# Zelfde resolutie als `st.pyplot`
+FIGURE_DPI = 200
+
+_figure_cache = OrderedDict()
+_figure_cache_bytes = 0
+_figure_lock = threading.Lock()
+
+
+def figure_png(builder, version, *frames, **params):
+    """PNG van `builder(*frames, **params)`, gedeeld door alle sessies; de figuur wordt na het renderen gesloten.
+
+    De sleutel is als bij `maps.map_html`: de naam van de bouwer, `version`
+    en `params`. pyplot is niet thread-safe, dus bouwen en renderen gebeurt
+    onder een lock.
+    """
+    import matplotlib.pyplot as plt
+
+    global _figure_cache_bytes
+    key = (builder.__name__, version, tuple(sorted(params.items())))
+    with _figure_lock:
+        if key in _figure_cache:
+            _figure_cache.move_to_end(key)
+            return _figure_cache[key]
+
+        fig = builder(*frames, **params)
+        try:
+            buffer = io.BytesIO()
+            fig.savefig(buffer, format="png", dpi=FIGURE_DPI, bbox_inches="tight")
+        finally:
+            plt.close(fig)
+        png = buffer.getvalue()
+
+        _figure_cache[key] = png
+        _figure_cache_bytes += len(png)
+        while _figure_cache_bytes > FIGURE_CACHE_BYTES and len(_figure_cache) > 1:
+            _, evicted = _figure_cache.popitem(last=False)
+            _figure_cache_bytes -= len(evicted)
+    return png
@@ -0,0 +1,163 @@
+"""Vereenvoudigde buurtgeometrie per zoomniveau.
+
+De buurtgrenzen uit `INDELING_BUURT.csv` hebben coördinaten met zes à
+zeven decimalen en honderden hoekpunten per buurt; op de zoomniveaus van
+de kaarten is het meeste daarvan onzichtbaar. Per zoomband wordt de
+indeling daarom als geheel vereenvoudigd (`coverage_simplify`, zodat
+gedeelde grenzen van buurburen identiek blijven en er geen kieren
+ontstaan) en daarna op een vast aantal decimalen afgerond.
+"""
+
+import geopandas as gpd  # type: ignore
+import numpy as np
+import pandas as pd
+import shapely  # type: ignore
+
+# Zoomband -> aantal decimalen na afronding (1e-4 graad is ca. 7 m)
+ZOOM_BANDS = {10: 4, 12: 4, 14: 5}
+
+# Tolerantie van de vereenvoudiging, in pixels op het zoomniveau van de band
+TOLERANCE_PX = 1.0
+
+
+def pixel_size(zoom):
+    """Breedte van één schermpixel in graden lengte op `zoom` (256px-tegels)."""
+    return 360 / (256 * 2 ** zoom)
+
+
+def zoom_band(zoom):
+    """De grootste zoomband die niet fijner is dan `zoom`."""
+    bands = sorted(ZOOM_BANDS)
+    return max([band for band in bands if band <= zoom], default=bands[0])
+
+
+def simplify_for_zoom(geoms, zoom):
+    """Vereenvoudigt en kwantiseert een aaneengesloten set polygonen voor `zoom`.
+
+    Buurten die na het afronden ongeldig zouden worden, houden hun
+    vereenvoudigde maar niet-afgeronde geometrie.
+    """
+    simplified = shapely.coverage_simplify(np.asarray(geoms), tolerance=pixel_size(zoom) * TOLERANCE_PX)
+    decimals = ZOOM_BANDS[zoom]
+    quantized = shapely.remove_repeated_points(
+        shapely.transform(simplified, lambda coords: np.round(coords, decimals))
+    )
+    valid = shapely.is_valid(quantized) & ~shapely.is_empty(quantized)
+    return np.where(valid, quantized, simplified)
+
+
+def build_geometry_lod(gdf, key="Buurtcode"):
+    """Bouwt de geometrie voor alle zoombanden, in lang formaat (sleutel, zoom, geometrie)."""
+    frames = [
+        gpd.GeoDataFrame(
+            {key: gdf[key].to_numpy(), "zoom": zoom},
+            geometry=simplify_for_zoom(gdf.geometry.values, zoom),
+            crs=gdf.crs,
+        )
+        for zoom in ZOOM_BANDS
+    ]
+    return pd.concat(frames, ignore_index=True)
+
+
+def _polygon_rings(geom):
+    """Ringen per polygoon van een (Multi)Polygon, als lijsten van coördinaatarrays."""
+    polygons = geom.geoms if geom.geom_type == "MultiPolygon" else [geom]
+    return [
+        [np.asarray(polygon.exterior.coords)] + [np.asarray(ring.coords) for ring in polygon.interiors]
+        for polygon in polygons
+    ]
+
+
+def _quantize_ring(coords, origin, scale):
+    """Zet een gesloten ring om naar unieke gehele punten, zonder het sluitpunt."""
+    points = np.rint((coords[:, :2] - origin) / scale).astype(np.int64)
+    keep = np.ones(len(points), dtype=bool)
+    keep[1:] = np.any(points[1:] != points[:-1], axis=1)
+    points = points[keep]
+    if len(points) > 1 and (points[0] == points[-1]).all():
+        points = points[:-1]
+    return [tuple(p) for p in points.tolist()]
+
+
+def _find_junctions(rings):
+    """Punten waar twee ringen samenkomen of uit elkaar gaan.
+
+    Een punt is een knooppunt als het in verschillende ringen met andere
+    buren voorkomt; daartussen lopen de gedeelde grenzen.
+    """
+    neighbours = {}
+    junctions = set()
+    for ring in rings:
+        n = len(ring)
+        for i, point in enumerate(ring):
+            pair = (ring[i - 1], ring[(i + 1) % n])
+            seen = neighbours.setdefault(point, pair)
+            if seen != pair and seen != pair[::-1]:
+                junctions.add(point)
+    return junctions
+
+
+def _cut_ring(ring, junctions):
+    """Knipt een ring op de knooppunten in bogen (elk inclusief beide eindpunten)."""
+    cuts = [i for i, point in enumerate(ring) if point in junctions]
+    if not cuts:
+        # Vaste startpositie, zodat dezelfde ring van de buurbuurt herkend wordt
+        start = ring.index(min(ring))
+        ring = ring[start:] + ring[:start]
+        return [ring + ring[:1]]
+    ring = ring[cuts[0]:] + ring[:cuts[0]]
+    closed = ring + ring[:1]
+    cuts = [i for i, point in enumerate(closed) if point in junctions]
+    return [closed[a:b + 1] for a, b in zip(cuts, cuts[1:])]
+
+
+def to_topojson(gdf, fields, decimals=6, object_name="buurten"):
+    """Codeert polygonen als TopoJSON met gedeelde bogen.
+
+    Een grens tussen twee buurten wordt één keer opgeslagen en vanuit
+    beide buurten aangeroepen (omgekeerd als index `~i`). Coördinaten
+    worden op `decimals` decimalen gekwantiseerd naar gehele getallen en
+    per boog als verschillen (delta's) opgeslagen.
+    """
+    scale = 10.0 ** -decimals
+    origin = np.floor(gdf.total_bounds[:2] / scale) * scale
+    shapes = [
+        [[_quantize_ring(ring, origin, scale) for ring in polygon] for polygon in _polygon_rings(geom)]
+        for geom in gdf.geometry
+    ]
+    junctions = _find_junctions(ring for shape in shapes for polygon in shape for ring in polygon)
+
+    arcs, arc_ids = [], {}
+
+    def arc_index(arc):
+        key = tuple(arc)
+        if key in arc_ids:
+            return arc_ids[key]
+        if key[::-1] in arc_ids:
+            return ~arc_ids[key[::-1]]
+        arc_ids[key] = len(arcs)
+        arcs.append(arc)
+        return arc_ids[key]
+
+    properties = gdf[fields].astype(object).where(gdf[fields].notna(), None).to_dict("records")
+    geometries = []
+    for shape, props in zip(shapes, properties):
+        polygons = [[[arc_index(arc) for arc in _cut_ring(ring, junctions)] for ring in polygon]
+                    for polygon in shape]
+        if len(polygons) == 1:
+            geometries.append({"type": "Polygon", "arcs": polygons[0], "properties": props})
+        else:
+            geometries.append({"type": "MultiPolygon", "arcs": polygons, "properties": props})
+
+    encoded = []
+    for arc in arcs:
+        points = np.asarray(arc, dtype=np.int64)
+        points[1:] = np.diff(points, axis=0)
+        encoded.append(points.tolist())
+
+    return {
+        "type": "Topology",
+        "transform": {"scale": [scale, scale], "translate": origin.tolist()},
+        "objects": {object_name: {"type": "GeometryCollection", "geometries": geometries}},
+        "arcs": encoded,
+    }
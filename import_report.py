@@ -0,0 +1,82 @@
+"""Importtijd van de app bij een koude start.
+
+Importeert de modules die `Untitled1.py` bovenaan laadt in een vers
+Python-proces met `-X importtime`, en telt de eigen tijd van elke module op
+per pakket. Wat de interpreter zelf al bij het opstarten laadt, telt niet
+mee. Zware pakketten die pas in een sectie nodig zijn (scikit-learn, scipy,
+matplotlib, seaborn, plotly) horen hier niet in te staan.
+
+Gebruik:
+
+    python import_report.py                 # rapport, met het standaardbudget
+    python import_report.py --budget 1.0    # exitcode 1 als de app trager importeert
+    python import_report.py clustering      # ook deze modules meten
+"""
+
+import argparse
+import ast
+import subprocess
+import sys
+from collections import Counter
+
+APP_PATH = "Untitled1.py"
+
+# Budget voor de imports van een koude start, in seconden
+IMPORT_BUDGET = 2.0
+
+
+def app_modules(path=APP_PATH):
+    """De modules die `path` op het hoogste niveau importeert, in volgorde."""
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules += [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.level == 0:
+            modules.append(node.module)
+    return list(dict.fromkeys(modules))
+
+
+def _importtime(code):
+    """Regels (eigen tijd in µs, modulenaam) van `-X importtime` voor `code`."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            capture_output=True, text=True, check=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line.split(":", 1)[1].split("|")
+        rows.append((int(self_us), name.strip()))
+    return rows
+
+
+def import_report(modules):
+    """Totale importtijd in seconden en de tijd per pakket, van groot naar klein."""
+    startup = {name for _, name in _importtime("pass")}
+    per_package = Counter()
+    for self_us, name in _importtime("import " + ", ".join(modules)):
+        if name not in startup:
+            per_package[name.split(".")[0]] += self_us / 1e6
+    return sum(per_package.values()), per_package.most_common()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Meet de importtijd van de app bij een koude start.")
+    parser.add_argument("modules", nargs="*", help="extra modules om mee te meten")
+    parser.add_argument("--budget", type=float, default=IMPORT_BUDGET,
+                        help=f"maximale importtijd in seconden (standaard: {IMPORT_BUDGET})")
+    parser.add_argument("--top", type=int, default=15, help="aantal pakketten in het rapport")
+    args = parser.parse_args(argv)
+
+    total, per_package = import_report(app_modules() + args.modules)
+    for package, seconds in per_package[:args.top]:
+        print(f"{package:<24} {seconds:6.3f}s")
+    print(f"{'totaal':<24} {total:6.3f}s  (budget {args.budget:.3f}s)")
+    if total > args.budget:
+        print("Importtijd boven het budget.", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""Indicatoren per jaar, opgeslagen als één partitie per jaar.
+
+De OIS-bestanden bevatten naast het jaar in hun naam ook de eerdere jaren.
+Deze opslag bewaart per jaar één Parquet-bestand (`indicatoren/<jaar>.parquet`)
+met per buurt, op CBS-buurtcode, de indicatoren van dat jaar. De
+buurtgrenzen staan er niet in, maar één keer per grensversie in
+`indicatoren/geometrie/<versie>.parquet`; elke partitie verwijst via de
+kolom `grens` naar de grenzen waarmee hij is opgebouwd.
+
+Bijwerken is incrementeel. Een bronbestand dat al eerder is ingelezen
+(zelfde inhoudshash, zie `manifest.json`) wordt niet opnieuw gelezen. Van
+een nieuw bestand worden alleen de jaar-indicatorcombinaties toegevoegd
+die nog ontbreken; bestaande jaren blijven staan, tenzij `--rebuild`. Is
+een al ingelezen bestand veranderd (een correctie), dan vervangen zijn
+waarden de opgeslagen jaar-indicatorcombinaties die erin staan.
+
+Gebruik:
+
+    python indicator_store.py             # voeg nieuwe jaren en bestanden toe
+    python indicator_store.py --rebuild   # bouw de hele historie opnieuw op
+
+De zonnepanelen, de warmtepompenergie en de aardgasvrije woningequivalenten
+komen uit één momentopname (`gdf_result1.csv`, 2023); de index zelf wordt
+niet per jaar opgeslagen, omdat die componenten geen reeks hebben.
+"""
+
+import argparse
+import glob
+import json
+import os
+
+import pandas as pd
+
+from loaders import (
+    INDICATOR_STORE_DIR, file_digest, indicator_geometry_path, indicator_partition_path, indicator_years,
+    read_indicator_geometry, read_indicator_years,
+)
+
+MANIFEST_PATH = os.path.join(INDICATOR_STORE_DIR, "manifest.json")
+
+INDELING_PATH = "INDELING_BUURT.csv"
+
+# CBS-buurtcode = gemeentecode van Amsterdam + de buurtcode van OIS
+CBS_PREFIX = "BU0363"
+
+# Indicator -> patroon van de OIS-bestanden (tabblad `data`, alle jaren)
+SOURCES = {
+    "Aanbod groen (1-10)": "ORGROEN_R-*-buurten.xlsx",
+    "Energielabel A++++ t/m B (%)": "Isolatie-*-buurten*.xlsx",
+    "Energielabel C t/m D (%)": "WLABELCD_P-*-buurten.xlsx",
+    "Energielabel E t/m G (%)": "WLABELEFG_P-*-buurten.xlsx",
+}
+
+# Momentopnamen zonder jaarkolom: (bestand, jaar, bronkolom -> indicator)
+SNAPSHOTS = [
+    ("gdf_result1.csv", 2023, {
+        "nl2023_panelen.1": "aantal_zonnepanelen",
+        "nl2023_wp": "hoeveelheid_wp_energie",
+        "aardgasvrije woningequivalenten": "aardgasvrije woningequivalenten",
+    }),
+]
+
+# Alle indicatoren in de opslag, in de volgorde van de app
+STORE_INDICATORS = [*SOURCES, *(column for _, _, columns in SNAPSHOTS for column in columns.values())]
+
+GEOMETRY_COLUMNS = ["CBS_Buurtcode", "Buurtcode", "Buurt", "Wijk", "Gebied", "Stadsdeel", "geometry"]
+
+
+def _read_ois(path, column):
+    """Alle jaren van één OIS-bestand, als (Jaar, CBS_Buurtcode, indicator)."""
+    data = pd.read_excel(path, sheet_name="data")
+    data = data[data["Gebiedsindeling"] == "buurten"]
+    return pd.DataFrame({
+        "Jaar": data["Jaar"].astype(int).to_numpy(),
+        "CBS_Buurtcode": (CBS_PREFIX + data["Code"]).to_numpy(),
+        column: data[column].to_numpy(dtype=float),
+    })
+
+
+def _read_snapshot(path, year, columns):
+    data = pd.read_csv(path, usecols=["Buurtcode", *columns]).rename(columns=columns)
+    data.insert(0, "CBS_Buurtcode", CBS_PREFIX + data.pop("Buurtcode"))
+    data.insert(0, "Jaar", year)
+    return data
+
+
+def _sources():
+    """Alle bronbestanden met een functie die ze inleest, oudste uitgave eerst."""
+    sources = []
+    for column, pattern in SOURCES.items():
+        for path in sorted(glob.glob(pattern)):
+            sources.append((path, lambda path=path, column=column: _read_ois(path, column)))
+    for path, year, columns in SNAPSHOTS:
+        sources.append((path, lambda path=path, year=year, columns=columns: _read_snapshot(path, year, columns)))
+    return sources
+
+
+def _load_manifest():
+    if not os.path.exists(MANIFEST_PATH):
+        return {"bestanden": {}, "jaren": {}}
+    with open(MANIFEST_PATH) as f:
+        return json.load(f)
+
+
+def store_geometry():
+    """Schrijft de buurtgrenzen van de huidige indeling, als die versie nog niet is opgeslagen."""
+    # Alleen bij het bijwerken nodig; de app laadt de pipeline zo niet mee
+    from pipeline import indeling
+
+    version = file_digest(INDELING_PATH)[:12]
+    path = indicator_geometry_path(version)
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        indeling()[GEOMETRY_COLUMNS].to_parquet(path, index=False)
+    return version
+
+
+def append_years(rebuild=False):
+    """Werkt de opslag bij met nieuwe en veranderde bronbestanden.
+
+    Geeft per geschreven jaar de toegevoegde en de vervangen indicatoren.
+    """
+    manifest = {"bestanden": {}, "jaren": {}} if rebuild else _load_manifest()
+    if rebuild:
+        for year in indicator_years():
+            os.remove(indicator_partition_path(year))
+    grens = store_geometry()
+
+    # Alleen bestanden die nieuw of veranderd zijn worden gelezen
+    new_rows = []
+    for path, read in _sources():
+        digest = file_digest(path)
+        previous = manifest["bestanden"].get(path)
+        if previous != digest:
+            # Een veranderd bestand corrigeert wat er al van in de opslag staat
+            new_rows.append(read().assign(vervangt=previous is not None))
+            manifest["bestanden"][path] = digest
+    if not new_rows:
+        return {}
+
+    written = {}
+    new = pd.concat(new_rows, ignore_index=True)
+    for year, rows in new.groupby("Jaar"):
+        info = manifest["jaren"].get(str(year), {"grens": grens, "indicatoren": []})
+        rows = rows.drop(columns="Jaar").dropna(axis=1, how="all")
+        indicators = [c for c in rows.columns if c not in ("CBS_Buurtcode", "vervangt")]
+        # Een opgeslagen jaar-indicator blijft staan, tenzij een veranderd bestand hem bevat
+        added = [c for c in indicators if c not in info["indicatoren"]]
+        corrections = rows[rows["vervangt"]].dropna(axis=1, how="all")
+        replaced = [c for c in indicators if c in info["indicatoren"] and c in corrections]
+        if not added and not replaced:
+            continue
+        # Bij meerdere uitgaven in één run wint de nieuwste (laatst gelezen) waarde
+        rows = rows.groupby("CBS_Buurtcode", sort=True)[added].last().reset_index()
+        if replaced:
+            corrections = corrections.groupby("CBS_Buurtcode", sort=True)[replaced].last().reset_index()
+            rows = rows.merge(corrections, on="CBS_Buurtcode", how="outer")
+
+        path = indicator_partition_path(year)
+        if os.path.exists(path):
+            stored = pd.read_parquet(path).drop(columns=["grens", *replaced])
+            rows = stored.merge(rows, on="CBS_Buurtcode", how="outer")
+        rows["grens"] = info["grens"]
+        os.makedirs(INDICATOR_STORE_DIR, exist_ok=True)
+        rows.to_parquet(path, index=False)
+
+        info["indicatoren"] = [*info["indicatoren"], *added]
+        manifest["jaren"][str(year)] = info
+        written[int(year)] = [*added, *(f"{column} (gecorrigeerd)" for column in replaced)]
+
+    with open(MANIFEST_PATH, "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    return written
+
+
+def indicator_trend(years, indicator, buurt=None):
+    """Gemiddelde van `indicator` per stadsdeel en voor heel Amsterdam per jaar, eventueel met één buurt."""
+    frame = read_indicator_years(years, [indicator])
+    areas = pd.concat([
+        read_indicator_geometry(version, ["CBS_Buurtcode", "Stadsdeel"]).assign(grens=version)
+        for version in frame["grens"].unique()
+    ])
+    frame = frame.merge(areas[["grens", "CBS_Buurtcode", "Stadsdeel"]], on=["grens", "CBS_Buurtcode"], how="left")
+    trend = frame.pivot_table(index="Jaar", columns="Stadsdeel", values=indicator, aggfunc="mean", observed=True)
+    trend["Amsterdam"] = frame.groupby("Jaar")[indicator].mean()
+    if buurt is not None:
+        trend[buurt[1]] = frame[frame["CBS_Buurtcode"] == buurt[0]].set_index("Jaar")[indicator]
+    trend = trend.dropna(how="all")
+    trend.index = trend.index.astype(str)
+    return trend
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Werk de jaaropslag van de buurtindicatoren bij.")
+    parser.add_argument("--rebuild", action="store_true", help="gooi de opslag weg en bouw alle jaren opnieuw op")
+    args = parser.parse_args(argv)
+
+    written = append_years(rebuild=args.rebuild)
+    if not written:
+        print("Geen nieuwe jaren of indicatoren.")
+    for year, columns in sorted(written.items()):
+        print(f"{year}: " + ", ".join(columns))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+"""Meting van tijd, geheugen en verzonden bytes per rerun van de app.
+
+De app opent bij elke rerun een `Rerun` (`start_rerun`) en zet om elke
+sectie en elke datastap een `step`. Per stap worden vastgelegd:
+
+- `seconds`: de wandkloktijd, inclusief geneste stappen;
+- `alloc_mb`: de piek van de geheugentoename volgens `tracemalloc`, alleen
+  als dat aan staat (`trace_memory` of `DASHBOARD_TRACEMALLOC=1`); het
+  meet het hele proces, dus ook andere sessies die tegelijk draaien;
+- `bytes`: de grootte van het resultaat van de stap; de stappen met
+  `sent=True` (HTML, PNG) tellen op tot de bytes naar de browser.
+
+`finish_rerun` schrijft elke rerun als één JSON-regel naar de logger
+`duurzaamheidsindex.metrics`, ook een rerun die is onderbroken (een
+widget veranderde, `st.rerun`/`st.stop`) of op een fout is gestuit; het
+veld `outcome` zegt welke. De regels gaan standaard naar stderr, met
+`DASHBOARD_METRICS_LOG=<bestand>` naar dat bestand. Het p95 van de
+rerunduur over zo'n bestand:
+
+    python instrumentation.py metrics.log
+    python instrumentation.py metrics.log --section Clusters
+"""
+
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import threading
+import time
+import tracemalloc
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from functools import wraps
+
+logger = logging.getLogger("duurzaamheidsindex.metrics")
+logger.setLevel(logging.INFO)
+if not logger.handlers:
+    if os.environ.get("DASHBOARD_METRICS_LOG"):
+        _handler = logging.FileHandler(os.environ["DASHBOARD_METRICS_LOG"], encoding="utf-8")
+    else:
+        _handler = logging.StreamHandler(sys.stderr)
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+    # Alleen de eigen JSON-regels, niet nog eens via de root-logger
+    logger.propagate = False
+
+if os.environ.get("DASHBOARD_TRACEMALLOC") == "1":
+    tracemalloc.start()
+
+# Duur van de laatste reruns in dit proces, voor het p95 in het beheeroverzicht
+HISTORY = deque(maxlen=500)
+
+# Elke sessie draait in een eigen thread; de lopende rerun hoort bij die thread
+_local = threading.local()
+
+
+@dataclass
+class Step:
+    name: str
+    depth: int
+    seconds: float = 0.0
+    alloc_mb: float | None = None
+    bytes: int | None = None
+
+    def size(self, value):
+        """Legt de grootte van `value` vast als de bytes van deze stap."""
+        self.bytes = payload_size(value)
+
+
+@dataclass
+class Rerun:
+    section: str
+    started: float = field(default_factory=time.perf_counter)
+    steps: list = field(default_factory=list)
+    seconds: float = 0.0
+    sent: int = 0
+    outcome: str = "ok"
+    # Open stappen: (stap, geheugen bij de start, hoogste piek van geneste stappen)
+    stack: list = field(default_factory=list, repr=False)
+
+
+def payload_size(value):
+    """Grootte in bytes van tekst, bytes en pandas-objecten (zonder de inhoud van objectkolommen); anders None."""
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, str):
+        return len(value)  # tekens; de pagina's zijn vrijwel helemaal ASCII
+    if isinstance(value, tuple):
+        sizes = [payload_size(v) for v in value]
+        return sum(s for s in sizes if s is not None) if any(s is not None for s in sizes) else None
+    usage = getattr(value, "memory_usage", None)
+    if callable(usage):
+        total = usage(index=True)
+        return int(total.sum() if hasattr(total, "sum") else total)
+    return None
+
+
+def trace_memory(on):
+    """Zet `tracemalloc` aan of uit, voor het hele proces."""
+    if on and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    elif not on and tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def start_rerun(section):
+    """Begint de meting van een rerun van `section` in deze thread."""
+    _local.rerun = Rerun(section)
+    return _local.rerun
+
+
+def current_rerun():
+    return getattr(_local, "rerun", None)
+
+
+@contextmanager
+def step(name, payload=None, sent=False):
+    """Meet het blok als stap `name` van de lopende rerun; zonder rerun (bv. een fragment) meet het niets.
+
+    `payload` is het resultaat waarvan de grootte wordt vastgelegd; met
+    `sent` telt die grootte mee in de bytes die naar de browser gaan.
+    """
+    rerun = current_rerun()
+    if rerun is None:
+        yield Step(name, 0)
+        return
+    record = Step(name, len(rerun.stack))
+    rerun.steps.append(record)
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        start_memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+    entry = [record, start_memory if tracing else 0, 0]
+    rerun.stack.append(entry)
+    start = time.perf_counter()
+    try:
+        yield record
+    finally:
+        record.seconds = time.perf_counter() - start
+        rerun.stack.pop()
+        if tracing and tracemalloc.is_tracing():
+            # Een geneste stap zet de piek terug; zijn piek telt daarom apart mee
+            peak = max(tracemalloc.get_traced_memory()[1], entry[2])
+            record.alloc_mb = max(peak - entry[1], 0) / 2**20
+            if rerun.stack:
+                rerun.stack[-1][2] = max(rerun.stack[-1][2], peak)
+        if payload is not None:
+            record.size(payload)
+        if sent and record.bytes:
+            rerun.sent += record.bytes
+
+
+def timed(name=None):
+    """Decorator: elke aanroep is een stap, met de grootte van het resultaat als bytes."""
+    def decorate(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with step(name or fn.__name__) as record:
+                result = fn(*args, **kwargs)
+                record.size(result)
+            return result
+        return wrapper
+    return decorate
+
+
+def finish_rerun(error=None):
+    """Sluit de rerun van deze thread af, logt hem als JSON en geeft hem terug.
+
+    `error` is de uitzondering die de rerun beëindigde: een `Exception` is
+    een fout, elke andere `BaseException` (zoals Streamlits rerun en stop)
+    een onderbreking.
+    """
+    rerun = current_rerun()
+    if rerun is None:
+        return None
+    _local.rerun = None
+    rerun.seconds = time.perf_counter() - rerun.started
+    if error is not None:
+        rerun.outcome = "fout" if isinstance(error, Exception) else "onderbroken"
+    HISTORY.append((rerun.section, rerun.seconds))
+    logger.info(json.dumps(rerun_record(rerun), ensure_ascii=False))
+    return rerun
+
+
+def rerun_record(rerun):
+    """De rerun als dict voor de log: totalen en alle stappen, in volgorde van start."""
+    return {
+        "event": "rerun",
+        "time": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+        "section": rerun.section,
+        "outcome": rerun.outcome,
+        "seconds": round(rerun.seconds, 4),
+        "bytes": rerun.sent,
+        "steps": [{k: round(v, 4) if isinstance(v, float) else v for k, v in asdict(s).items()} for s in rerun.steps],
+    }
+
+
+def percentile(values, q):
+    """Het `q`-de percentiel (0-100) van `values`, lineair geïnterpoleerd."""
+    values = sorted(values)
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[q - 1]
+
+
+def recent_p95(section=None):
+    """p95 van de rerunduur in dit proces, eventueel voor één sectie; None zonder reruns."""
+    durations = [seconds for name, seconds in HISTORY if section is None or name == section]
+    return percentile(durations, 95) if durations else None
+
+
+def summarize(records):
+    """Per sectie en per stap (aantal, p50, p95, max) van de duur, uit logregels als dict.
+
+    De rij "rerun" telt alle reruns; daarnaast is er een rij per uitkomst.
+    """
+    durations = defaultdict(list)
+    for record in records:
+        durations[(record["section"], "rerun")].append(record["seconds"])
+        durations[(record["section"], f"rerun ({record.get('outcome', 'ok')})")].append(record["seconds"])
+        for s in record["steps"]:
+            durations[(record["section"], "  " * (s["depth"] + 1) + s["name"])].append(s["seconds"])
+    rows = [
+        (section, name, len(values), percentile(values, 50), percentile(values, 95), max(values))
+        for (section, name), values in durations.items()
+    ]
+    # Per sectie eerst de reruns, dan de stappen in volgorde van de log
+    return sorted(rows, key=lambda row: (row[0], not row[1].startswith("rerun")))
+
+
+def read_log(path):
+    """De reruns uit een metriekenlog; andere regels worden overgeslagen."""
+    records = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(record, dict) and record.get("event") == "rerun":
+                records.append(record)
+    return records
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Vat de rerunduur uit een metriekenlog van de app samen.")
+    parser.add_argument("log", help="bestand met de JSON-regels (DASHBOARD_METRICS_LOG)")
+    parser.add_argument("--section", help="alleen deze sectie")
+    args = parser.parse_args(argv)
+
+    records = [r for r in read_log(args.log) if args.section is None or r["section"] == args.section]
+    if not records:
+        parser.error("geen reruns in de log" + (f" voor {args.section}" if args.section else ""))
+    print(f"{'sectie':<20} {'stap':<32} {'n':>5} {'p50':>8} {'p95':>8} {'max':>8}")
+    for section, name, n, p50, p95, longest in summarize(records):
+        print(f"{section:<20} {name:<32} {n:>5} {p50:8.3f} {p95:8.3f} {longest:8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""Procesbrede cache voor de databronnen van de app.
+
+Streamlit voert `Untitled1.py` bij elke interactie opnieuw uit, maar
+geïmporteerde modules blijven per serverproces geladen. De cache hieronder
+leeft dus zolang het proces leeft en wordt gedeeld door alle sessies: elk
+bestand wordt één keer geparsed en pas opnieuw ingelezen als de inhoud
+echt is veranderd.
+
+De app leest de verwerkte buurtdata als GeoParquet (`buurten.parquet`,
+`energielabels.parquet`, geschreven door `pipeline.py`): WKB-geometrie,
+getypeerde kolommen en alleen de kolommen die een sectie opvraagt.
+"""
+
+import glob
+import hashlib
+import os
+import threading
+from dataclasses import dataclass
+
+import geopandas as gpd  # type: ignore
+import pandas as pd
+
+from geometry import zoom_band
+from spatial import LOCATION_COLUMNS, BuurtIndex
+
+BUURTEN_PATH = "buurten.parquet"
+ENERGIELABELS_PATH = "energielabels.parquet"
+GEOMETRY_LOD_PATH = "buurten_lod.parquet"
+AGGREGATES_PATH = "aggregaten.parquet"
+
+# Jaaropslag van de indicatoren (zie indicator_store.py)
+INDICATOR_STORE_DIR = "indicatoren"
+
+
+@dataclass(frozen=True)
+class _CacheEntry:
+    mtime_ns: int
+    size: int
+    digest: str
+    frame: object
+
+
+_cache: dict = {}
+_digests: dict = {}
+_lock = threading.Lock()
+
+
+def file_digest(path):
+    """Berekent de inhoudshash van een bestand (blake2b, hex)."""
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _digest(key, stat):
+    """Inhoudshash van `key`, alleen opnieuw berekend als mtime of grootte afwijkt."""
+    cached = _digests.get(key)
+    if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+        return cached[2]
+    digest = file_digest(key)
+    _digests[key] = (stat.st_mtime_ns, stat.st_size, digest)
+    return digest
+
+
+def _entry(path, read, columns=None):
+    """Geeft de actuele cache-entry voor `path`, en parseert alleen als het moet.
+
+    Eerst wordt goedkoop op mtime en grootte gecontroleerd; pas als die
+    afwijken wordt de inhoudshash berekend. Een bestand dat alleen is
+    'aangeraakt' (zelfde inhoud) wordt dus niet opnieuw geparsed.
+    """
+    key = os.path.abspath(path)
+    cache_key = (key, read.__name__, tuple(columns) if columns is not None else None)
+    stat = os.stat(key)
+    with _lock:
+        entry = _cache.get(cache_key)
+        if entry is not None and (entry.mtime_ns, entry.size) == (stat.st_mtime_ns, stat.st_size):
+            return entry
+
+        digest = _digest(key, stat)
+        if entry is not None and entry.digest == digest:
+            frame = entry.frame
+        elif columns is not None:
+            frame = read(key, columns=list(columns))
+        else:
+            frame = read(key)
+        entry = _CacheEntry(stat.st_mtime_ns, stat.st_size, digest, frame)
+        _cache[cache_key] = entry
+        return entry
+
+
+def read_geoparquet(path, columns=None):
+    """Leest (een deel van de kolommen van) een GeoParquet-bestand via de gedeelde cache.
+
+    Elke kolomselectie is een eigen cache-entry; de geometriekolom wordt
+    altijd meegelezen. Het gecachte GeoDataFrame wordt nooit zelf
+    teruggegeven, maar een ondiepe kopie: de kolomdata wordt gedeeld, dus
+    dit kost geen extra geheugen per sessie. Kolommen toevoegen (zoals
+    `Cluster` of `Color`) mag; bestaande waarden in-place wijzigen niet.
+    """
+    if columns is not None and "geometry" not in columns:
+        columns = [*columns, "geometry"]
+    return _entry(path, gpd.read_parquet, columns).frame.copy(deep=False)
+
+
+def read_buurten(columns=None):
+    """De verwerkte buurtdata met de Duurzaamheidsindex."""
+    return read_geoparquet(BUURTEN_PATH, columns)
+
+
+def read_energielabels(columns=None):
+    """De energielabelaandelen per buurt."""
+    return read_geoparquet(ENERGIELABELS_PATH, columns)
+
+
+def read_geometry_lod(zoom):
+    """Vereenvoudigde buurtgeometrie voor de zoomband van `zoom`, geïndexeerd op Buurtcode."""
+    lod = _entry(GEOMETRY_LOD_PATH, gpd.read_parquet).frame
+    band = lod[lod["zoom"] == zoom_band(zoom)]
+    return band.set_index("Buurtcode").geometry
+
+
+def _build_buurt_index(path):
+    return BuurtIndex(gpd.read_parquet(path, columns=[*LOCATION_COLUMNS, "geometry"]))
+
+
+def read_buurt_index():
+    """Ruimtelijke index over de buurtgrenzen, één keer per versie van het bestand opgebouwd."""
+    return _entry(BUURTEN_PATH, _build_buurt_index).frame
+
+
+def _split_levels(path):
+    """Leest de kengetallentabel en splitst die één keer in een frame per niveau."""
+    return {level: frame.reset_index(drop=True) for level, frame in gpd.read_parquet(path).groupby("niveau")}
+
+
+def read_aggregates(level):
+    """De voorberekende kengetallen van één niveau (Stadsdeel, Gebied, Wijk of Buurt)."""
+    return _entry(AGGREGATES_PATH, _split_levels).frame[level].copy(deep=False)
+
+
+def indicator_partition_path(year):
+    return os.path.join(INDICATOR_STORE_DIR, f"{year}.parquet")
+
+
+def indicator_geometry_path(version):
+    return os.path.join(INDICATOR_STORE_DIR, "geometrie", f"{version}.parquet")
+
+
+def indicator_years():
+    """De jaren waarvoor de jaaropslag een partitie heeft, oplopend."""
+    paths = glob.glob(os.path.join(INDICATOR_STORE_DIR, "*.parquet"))
+    return sorted(int(os.path.basename(path)[:-len(".parquet")]) for path in paths)
+
+
+def read_indicator_years(years, columns=None):
+    """Indicatoren van `years` uit de jaaropslag, met een kolom `Jaar`.
+
+    Alleen de partities van de gevraagde jaren worden gelezen, elk via de
+    gedeelde cache. Indicatoren die in een jaar ontbreken zijn NaN.
+    """
+    frames = []
+    for year in years:
+        frame = _entry(indicator_partition_path(year), pd.read_parquet).frame
+        if columns is not None:
+            frame = frame.reindex(columns=["CBS_Buurtcode", *columns, "grens"])
+        frames.append(frame.assign(Jaar=year))
+    return pd.concat(frames, ignore_index=True)
+
+
+def read_indicator_geometry(version, columns=None):
+    """De buurtgrenzen van grensversie `version` uit de jaaropslag."""
+    return read_geoparquet(indicator_geometry_path(version), columns)
+
+
+def data_version(*paths):
+    """Versiesleutel voor één of meer bronbestanden, op basis van de inhoud."""
+    with _lock:
+        return "-".join(_digest(os.path.abspath(path), os.stat(path))[:12] for path in paths)
+
+
+def clear_cache():
+    """Leegt de cache, bijvoorbeeld na het opnieuw draaien van de pipeline."""
+    with _lock:
+        _cache.clear()
+        _digests.clear()
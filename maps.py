@@ -0,0 +1,747 @@
+"""Bouwstenen voor de folium-kaarten in de app."""
+
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import folium  # type: ignore
+import geopandas as gpd  # type: ignore
+import numpy as np
+import pandas as pd
+from branca.colormap import StepColormap  # type: ignore
+from branca.element import MacroElement  # type: ignore
+from branca.utilities import color_brewer  # type: ignore
+from folium.elements import JSCSSMixin  # type: ignore
+from folium.plugins import DualMap, FastMarkerCluster  # type: ignore
+from jinja2 import Template
+
+from aggregates import STATISTICS, statistic_column
+from clustering import FEATURES, REFERENCE_PATH, cluster_labels
+from constants import IMPUTED_FLAGS
+from geometry import ZOOM_BANDS, to_topojson, zoom_band
+from raster import density, density_colormap, density_grid, grid_to_png
+from loaders import (
+    AGGREGATES_PATH, BUURTEN_PATH, ENERGIELABELS_PATH, GEOMETRY_LOD_PATH, data_version, read_aggregates,
+    read_geometry_lod,
+)
+
+# Zoomniveau waarmee alle kaarten openen
+DEFAULT_ZOOM = 12
+
+# Naam van de buurtlaag binnen de TopoJSON
+TOPO_OBJECT = "buurten"
+
+
+def with_zoom_geometry(gdf, zoom=DEFAULT_ZOOM, key="Buurtcode"):
+    """Vervangt de geometrie door de vereenvoudigde versie voor `zoom`.
+
+    Buurten die niet in de geometrieopslag staan, houden hun eigen geometrie.
+    """
+    lod = read_geometry_lod(zoom).reindex(gdf[key])
+    missing = lod.isna().to_numpy()
+    geoms = lod.to_numpy()
+    geoms[missing] = gdf.geometry.to_numpy()[missing]
+    return gdf.set_geometry(gpd.GeoSeries(geoms, index=gdf.index, crs=gdf.crs))
+
+
+def slim_topojson(gdf, fields, zoom=DEFAULT_ZOOM):
+    """TopoJSON met alleen de geometrie en de opgegeven velden, met gedeelde grenzen.
+
+    folium zet bij `GeoJson(data=gdf)` alle kolommen van het frame in de
+    pagina. Door vooraf te selecteren gaat alleen mee wat een laag
+    daadwerkelijk toont. Met `zoom` wordt de vereenvoudigde geometrie voor
+    dat zoomniveau gebruikt; `zoom=None` stuurt de volledige geometrie.
+    Gedeelde buurtgrenzen gaan maar één keer mee, met gehele,
+    delta-gecodeerde coördinaten. Gebruik met `folium.TopoJson(...,
+    f"objects.{TOPO_OBJECT}")` of `Choropleth(..., topojson=...)`.
+    """
+    fields = list(dict.fromkeys(fields))
+    if zoom is None:
+        return to_topojson(gdf, fields, decimals=7, object_name=TOPO_OBJECT)
+    gdf = with_zoom_geometry(gdf, zoom)
+    return to_topojson(gdf, fields, decimals=ZOOM_BANDS[zoom_band(zoom)], object_name=TOPO_OBJECT)
+
+
+def feature_lookup(gdf, columns, key="Buurtcode"):
+    """Sleuteltabel `key` -> {kolom: waarde}, één keer per dataset opgebouwd.
+
+    Voor style-, tooltip- en popupfuncties die per feature gegevens uit het
+    frame nodig hebben: één dict-lookup per feature in plaats van een scan
+    van de hele kolom. Sleutel op Buurtcode; buurtnamen zijn niet uniek.
+    """
+    return gdf.set_index(key)[list(columns)].to_dict("index")
+
+
+def set_feature_property(topology, name, func):
+    """Zet eigenschap `name` op elke buurt in een TopoJSON van `slim_topojson`."""
+    for feature in topology["objects"][TOPO_OBJECT]["geometries"]:
+        feature["properties"][name] = func(feature)
+    return topology
+
+
+def add_choropleth(m, gdf, column, fill_color, legend_name, tooltip, popup, key="Buurtcode",
+                   zoom=DEFAULT_ZOOM):
+    """Voegt een choropleth met tooltip en popup toe als één GeoJSON-laag.
+
+    `tooltip` en `popup` zijn paren van (velden, aliassen). De buurten
+    worden één keer meegestuurd, als TopoJSON: de tooltip en popup hangen
+    aan de laag van de choropleth zelf in plaats van aan een tweede,
+    transparante laag.
+    """
+    tooltip_fields, tooltip_aliases = tooltip
+    popup_fields, popup_aliases = popup
+    choropleth = folium.Choropleth(
+        geo_data=slim_topojson(gdf, [key, *tooltip_fields, *popup_fields], zoom),
+        topojson=f"objects.{TOPO_OBJECT}",
+        data=gdf,
+        columns=[key, column],
+        key_on=f"feature.properties.{key}",
+        fill_color=fill_color,
+        fill_opacity=0.7,
+        line_opacity=0.2,
+        legend_name=legend_name,
+    ).add_to(m)
+    folium.GeoJsonTooltip(
+        fields=tooltip_fields,
+        aliases=tooltip_aliases,
+        localize=True,
+        sticky=False
+    ).add_to(choropleth.geojson)
+    folium.GeoJsonPopup(
+        fields=popup_fields,
+        aliases=popup_aliases,
+        max_width=300
+    ).add_to(choropleth.geojson)
+    return choropleth
+
+
+def choropleth_bins(values, n_bins=6):
+    """Klassegrenzen zoals `folium.Choropleth` ze maakt: gelijke breedte tussen min en max."""
+    values = np.asarray(values, dtype=float)
+    return np.histogram_bin_edges(values[~np.isnan(values)], bins=n_bins)
+
+
+def step_colors(values, bins, fill_color):
+    """Kleur per waarde in de klassen `bins`; waarden buiten het bereik krijgen de uiterste klasse."""
+    colors = np.asarray(color_brewer(fill_color, n=len(bins) - 1))
+    return colors[np.digitize(values, bins[1:-1])]
+
+
+def step_colormap(bins, fill_color, caption):
+    """Legenda met dezelfde klassen en kleuren als `step_colors`."""
+    return StepColormap(color_brewer(fill_color, n=len(bins) - 1), index=list(bins),
+                        vmin=bins[0], vmax=bins[-1], caption=caption)
+
+
+# Vooraf gerenderde tegels (zie `tiles.py`); Streamlit serveert ./static onder /app/static
+TILES_DIR = os.path.join("static", "tiles")
+
+
+def tile_info(layer, version=None):
+    """Metadata van de tegels van `layer`, of None als ze ontbreken of bij een andere dataversie horen."""
+    path = os.path.join(TILES_DIR, layer, "meta.json")
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        info = json.load(f)
+    if version is not None and info["version"] != version:
+        return None
+    return info
+
+
+def tiles_url():
+    """URL van `TILES_DIR` op de Streamlit-server, ook onder een `server.baseUrlPath`."""
+    from streamlit import config  # type: ignore
+
+    base = config.get_option("server.baseUrlPath").strip("/")
+    return f"/{base}/app/static/tiles" if base else "/app/static/tiles"
+
+
+def add_tile_layer(m, layer, name, opacity=0.7):
+    """Voegt de tegels van `layer` toe; boven het hoogste gerenderde niveau worden ze vergroot."""
+    info = tile_info(layer)
+    return folium.TileLayer(
+        tiles=f"{tiles_url()}/{layer}/{{z}}/{{x}}/{{y}}.png",
+        attr="Gemeente Amsterdam",
+        name=name,
+        overlay=True,
+        opacity=opacity,
+        min_zoom=min(info["zooms"]),
+        max_native_zoom=max(info["zooms"]),
+        max_zoom=18,
+    ).add_to(m)
+
+
+class ColorReceiver(MacroElement):
+    """Laat een buurtlaag zijn vulkleuren bijwerken via `postMessage`.
+
+    Het bericht `{type: "buurt-colors", colors: {Buurtcode: kleur}}` kleurt
+    de buurten opnieuw zonder de kaart te herladen; zie `bridge.push_colors`.
+    Bij het laden vraagt de kaart de pagina om de laatste kleuren.
+    """
+
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+            window.addEventListener("message", function (event) {
+                if (!event.data || event.data.type !== "buurt-colors") {
+                    return;
+                }
+                var colors = event.data.colors;
+                {{ this.layer.get_name() }}.eachLayer(function (layer) {
+                    var color = colors[layer.feature.properties.{{ this.key }}];
+                    if (color) {
+                        layer.setStyle({fillColor: color});
+                    }
+                });
+            });
+            window.parent.postMessage({type: "buurt-map-ready"}, "*");
+        {% endmacro %}
+    """)
+
+    def __init__(self, layer, key="Buurtcode"):
+        super().__init__()
+        self._name = "ColorReceiver"
+        self.layer = layer
+        self.key = key
+
+
+class ClickSender(MacroElement):
+    """Meldt klikken op de kaart aan de pagina als `{type: "buurt-click", lat, lng}`; zie `bridge.last_click`."""
+
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+            {{ this._parent.get_name() }}.on("click", function (event) {
+                window.parent.postMessage(
+                    {type: "buurt-click", lat: event.latlng.lat, lng: event.latlng.lng}, "*"
+                );
+            });
+        {% endmacro %}
+    """)
+
+    def __init__(self):
+        super().__init__()
+        self._name = "ClickSender"
+
+
+class SharedTopoJson(JSCSSMixin, MacroElement):
+    """Buurtgrenzen die één keer in de pagina staan, voor meerdere `SharedLayer`s (ook op verschillende kaarten)."""
+
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+            var {{ this.get_name() }}_data = {{ this.data|tojson }};
+            var {{ this.get_name() }} = topojson.feature(
+                {{ this.get_name() }}_data, {{ this.get_name() }}_data.objects.{{ this.object_name }}
+            );
+        {% endmacro %}
+    """)
+
+    default_js = folium.TopoJson.default_js
+
+    def __init__(self, data, object_name=TOPO_OBJECT):
+        super().__init__()
+        self._name = "SharedTopoJson"
+        self.data = data
+        self.object_name = object_name
+
+
+class SharedLayer(MacroElement):
+    """Laag uit een `SharedTopoJson`, gevuld met de kleur in eigenschap `color`.
+
+    De tooltip toont de eigenschappen `fields` met hun `aliases`; buurten
+    zonder kleur blijven leeg. `style` geldt voor alle buurten.
+    """
+
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+            var {{ this.get_name() }} = L.geoJson({{ this.data.get_name() }}, {
+                style: function (feature) {
+                    var color = feature.properties.{{ this.color }};
+                    return Object.assign(
+                        {fillColor: color || "#ffffff", fillOpacity: color ? {{ this.fill_opacity }} : 0},
+                        {{ this.style|tojson }}
+                    );
+                }
+            }).bindTooltip(function (layer) {
+                var properties = layer.feature.properties;
+                var aliases = {{ this.aliases|tojson }};
+                return {{ this.fields|tojson }}.map(function (field, i) {
+                    var value = properties[field] === null ? "-" : properties[field];
+                    return "<b>" + aliases[i] + "</b> " + value;
+                }).join("<br>");
+            }, {sticky: true}).addTo({{ this._parent.get_name() }});
+        {% endmacro %}
+    """)
+
+    def __init__(self, data, color, fields, aliases, fill_opacity=0.7, style=None):
+        super().__init__()
+        self._name = "SharedLayer"
+        self.data = data
+        self.color = color
+        self.fields = fields
+        self.aliases = aliases
+        self.fill_opacity = fill_opacity
+        self.style = style or {}
+
+
+# Labelgroep -> kolom met het aandeel woningen, in volgorde van voorkeur bij gelijke stand
+LABEL_COLUMNS = {
+    "A++++ t/m B": "Energielabel A++++ t/m B (%)",
+    "C t/m D": "Energielabel C t/m D (%)",
+    "E t/m G": "Energielabel E t/m G (%)",
+}
+
+
+def dominant_label(gdf):
+    """Labelgroep met het grootste aandeel per buurt; ontbrekende aandelen tellen niet mee."""
+    shares = gdf[list(LABEL_COLUMNS.values())].to_numpy(dtype=float)
+    best = np.argmax(np.where(np.isnan(shares), -np.inf, shares), axis=1)
+    return pd.Series(np.array(list(LABEL_COLUMNS))[best], index=gdf.index)
+
+
+def energielabel_tooltip(gdf):
+    """Tooltiptekst per buurt, in één keer voor de hele kolom opgebouwd."""
+    tooltip = "<b>Buurt:</b> " + gdf["Buurt"].astype(str) + "<br><b>Dominant label:</b> " + gdf["Dominant_Label"]
+    for label, column in LABEL_COLUMNS.items():
+        tooltip += f"<br><b>{label}:</b> " + gdf[column].astype(str) + "%"
+    return tooltip
+
+
+def add_energielabel_layer(m, gdf, zoom=DEFAULT_ZOOM):
+    """Voegt de energielabelkaart toe als één laag, gekleurd via de eigenschap `Color`.
+
+    Verwacht de kolommen `Dominant_Label` en `Color` in `gdf`.
+    """
+    gdf = gdf.assign(tooltip=energielabel_tooltip(gdf))
+    layer = folium.TopoJson(
+        slim_topojson(gdf, ["Color", "tooltip"], zoom),
+        f"objects.{TOPO_OBJECT}",
+        name="Energielabels",
+        style_function=lambda feature: {
+            "fillColor": feature["properties"]["Color"],
+            "color": "black",
+            "weight": 0.5,
+            "fillOpacity": 0.6,
+        },
+        tooltip=folium.GeoJsonTooltip(fields=["tooltip"], labels=False),
+    )
+    return layer.add_to(m)
+
+
+def point_features(lat, lng, **properties):
+    """GeoJSON-FeatureCollection met één punt per rij, in één doorgang uit kolommen opgebouwd."""
+    names = list(properties)
+    columns = [np.asarray(values).tolist() for values in properties.values()]
+    features = [
+        {
+            "type": "Feature",
+            "geometry": {"type": "Point", "coordinates": [x, y]},
+            "properties": dict(zip(names, values)),
+        }
+        for x, y, *values in zip(np.asarray(lng).tolist(), np.asarray(lat).tolist(), *columns)
+    ]
+    return {"type": "FeatureCollection", "features": features}
+
+
+# Callback voor FastMarkerCluster met rijen [lat, lng, kleur, icoon, popup]:
+# bouwt in de browser dezelfde marker als folium.Icon(color, icon, prefix="fa").
+AWESOME_MARKER_CALLBACK = """
+function (row) {
+    var icon = L.AwesomeMarkers.icon({
+        icon: row[3], markerColor: row[2], iconColor: "white", prefix: "fa", extraClasses: "fa-rotate-0"
+    });
+    var marker = L.marker(new L.LatLng(row[0], row[1]), {icon: icon});
+    marker.bindPopup(row[4]);
+    return marker;
+}
+"""
+
+
+# Bestanden waar de kaarten van afhangen; samen bepalen ze de dataversie
+MAP_DATA_FILES = [BUURTEN_PATH, ENERGIELABELS_PATH, GEOMETRY_LOD_PATH, AGGREGATES_PATH, REFERENCE_PATH]
+
+AMSTERDAM = [52.3728, 4.8936]
+
+# Popuplabel van de geschatte indicatoren (zie `imputed_note`)
+IMPUTED_ALIAS = "Geschat (mediaan van de omgeving):"
+
+# Indicatoren van de gepubliceerde index
+INDEX_INDICATORS = ["Aanbod groen (1-10)", "aardgasvrije woningequivalenten", "aantal_zonnepanelen"]
+
+# Velden voor tooltip en popup van de indexkaart
+INDEX_TOOLTIP = (
+    ["Buurt", "Duurzaamheidsindex"],
+    ["Buurt:", "Duurzaamheidsindex:"],
+)
+INDEX_POPUP = (
+    ["Buurt", "Duurzaamheidsindex", "Aanbod groen (1-10)", "aardgasvrije woningequivalenten", "aantal_zonnepanelen",
+     "Geschat"],
+    ["Buurt:", "Duurzaamheidsindex:", "Aanbod groen (1-10):", "Aardgasvrije woningen(%):", "Aantal Zonnepanelen:",
+     IMPUTED_ALIAS],
+)
+
+CLUSTER_COLORS = ["red", "blue", "green", "purple", "orange", "pink", "cyan", "yellow"]
+
+# Kleur per categorie van het groenaanbod
+CATEGORY_COLORS = {
+    'Veel beter dan gemiddeld': 'green',
+    'Beter dan gemiddeld': 'lightgreen',
+    'Rond het stedelijk gemiddelde': 'yellow',
+    'Slechter dan gemiddeld': 'orange',
+    'Veel slechter dan gemiddeld': 'red',
+    'Geen gegevens': 'white'  # Wit voor ontbrekende gegevens
+}
+
+# Kleur per dominant energielabel
+LABEL_COLORS = {
+    "A++++ t/m B": "#2ecc71",  # Groen
+    "C t/m D": "#f1c40f",      # Geel
+    "E t/m G": "#e74c3c",      # Rood
+}
+
+GROEN_LEGEND = """
+<div style="position: fixed; 
+            bottom: 30px; left: 30px; width: 250px; height: 180px; 
+            border:2px solid grey; background-color:white; z-index:9999;
+            font-size: 12px; padding: 10px;">
+    <b>Legenda</b><br>
+    <i style="background: green; width: 20px; height: 20px; display: inline-block; margin-right: 5px;"></i>Veel beter dan gemiddeld<br>
+    <i style="background: lightgreen; width: 20px; height: 20px; display: inline-block; margin-right: 5px;"></i>Beter dan gemiddeld<br>
+    <i style="background: yellow; width: 20px; height: 20px; display: inline-block; margin-right: 5px;"></i>Rond het stedelijk gemiddelde<br>
+    <i style="background: orange; width: 20px; height: 20px; display: inline-block; margin-right: 5px;"></i>Slechter dan gemiddeld<br>
+    <i style="background: red; width: 20px; height: 20px; display: inline-block; margin-right: 5px;"></i>Veel slechter dan gemiddeld<br>
+    <i style="background: white; width: 20px; height: 20px; display: inline-block; margin-right: 5px; border: 1px solid black;"></i>Geen gegevens<br>
+</div>
+"""
+
+AARDGASVRIJ_LEGEND = '''
+<div style="position: fixed; 
+            bottom: 10px; left: 10px; width: 250px; height: 120px; 
+            background-color: white; z-index:9999; font-size:14px;
+            border:2px solid grey; border-radius:5px; padding: 10px;">
+    <b>Legenda:</b><br>
+    <i style="background: #edf8fb; width: 20px; height: 10px; display: inline-block; border: 1px solid grey;"></i>
+    Lage concentratie<br>
+    <i style="background: #b2e2e2; width: 20px; height: 10px; display: inline-block; border: 1px solid grey;"></i>
+    Middelhoge concentratie<br>
+    <i style="background: #66c2a4; width: 20px; height: 10px; display: inline-block; border: 1px solid grey;"></i>
+    Hoge concentratie<br>
+    <i style="background: #2ca25f; width: 20px; height: 10px; display: inline-block; border: 1px solid grey;"></i>
+    Zeer hoge concentratie<br>
+</div>
+'''
+
+
+def imputed_note(gdf, columns):
+    """Per buurt de indicatoren uit `columns` waarvan de waarde geschat is, of "nee"."""
+    names = [IMPUTED_FLAGS[column].removesuffix("_imputed").replace("_", " ") for column in columns]
+    flags = gdf[[IMPUTED_FLAGS[column] for column in columns]].to_numpy(dtype=bool)
+    return pd.Series([", ".join(n for n, f in zip(names, row) if f) or "nee" for row in flags], index=gdf.index)
+
+
+def index_map(gdf, zoom=DEFAULT_ZOOM, tiles=False):
+    """Choropleth van de Duurzaamheidsindex, te herkleuren en met doorgegeven klikken.
+
+    Met `tiles` worden de vooraf gerenderde tegels getoond in plaats van
+    de buurtgrenzen; herkleuren kan dan niet, klikken wel.
+    """
+    m = folium.Map(location=AMSTERDAM, zoom_start=zoom)
+    if tiles:
+        add_tile_layer(m, "duurzaamheidsindex", "Duurzaamheidsindex")
+        step_colormap(choropleth_bins(gdf["Duurzaamheidsindex"]), "YlGn", "Duurzaamheidsindex (0-1)").add_to(m)
+        ClickSender().add_to(m)
+        return m
+    choropleth = add_choropleth(
+        m, gdf.assign(Geschat=imputed_note(gdf, INDEX_INDICATORS)), "Duurzaamheidsindex", "YlGn",
+        "Duurzaamheidsindex (0-1)",
+        tooltip=INDEX_TOOLTIP, popup=INDEX_POPUP, zoom=zoom,
+    )
+    # Voor een eigen weging van de index (`weighting.py`) en de buurtdetails bij een klik
+    ColorReceiver(choropleth.geojson).add_to(m)
+    ClickSender().add_to(m)
+    return m
+
+
+def heat_map(gdf, zoom=DEFAULT_ZOOM):
+    """Dichtheid van zonnepanelen (per km²) als vooraf berekend raster."""
+    m = folium.Map(location=AMSTERDAM, zoom_start=zoom)
+    values = density(gdf, "aantal_zonnepanelen")
+    grid, bounds = density_grid(gdf, values)
+    colormap = density_colormap(values, "Zonnepanelen per km²")
+    folium.raster_layers.ImageOverlay(
+        grid_to_png(grid, colormap),
+        bounds=bounds,
+        opacity=0.75,
+        name="Zonnepanelen per km²",
+    ).add_to(m)
+    colormap.add_to(m)
+    return m
+
+
+def cluster_map(gdf, n_clusters=8, zoom=DEFAULT_ZOOM):
+    """Buurten als punten, gekleurd naar cluster; clustert zelf op `FEATURES`."""
+    labels = cluster_labels(gdf[FEATURES].fillna(0), n_clusters=n_clusters, random_state=42)
+    m = folium.Map(location=AMSTERDAM, zoom_start=zoom)
+    # Eén puntenlaag, kleur en popup per punt als eigenschap
+    popup = (
+        "Buurt: " + gdf["Buurt"].astype(str)
+        + "<br>Cluster: " + pd.Series(labels, index=gdf.index).astype(str)
+        + "<br>Duurzaamheidsindex: " + gdf["Duurzaamheidsindex"].astype(str)
+        + "<br>Aantal zonnepanelen: " + gdf["aantal_zonnepanelen"].astype(str)
+        + "<br>Aardgasequivalent: " + gdf["aardgasvrije woningequivalenten"].astype(str)
+        + "<br>Aanbod groen: " + gdf["Aanbod groen (1-10)"].astype(str)
+        + "<br>Geschat: " + imputed_note(gdf, INDEX_INDICATORS)
+    )
+    folium.GeoJson(
+        point_features(gdf["LAT"], gdf["LNG"], color=np.asarray(CLUSTER_COLORS)[labels], popup=popup),
+        marker=folium.CircleMarker(radius=6, fill=True, fill_opacity=0.7),
+        style_function=lambda feature: {
+            "color": feature["properties"]["color"],
+            "fillColor": feature["properties"]["color"],
+        },
+        popup=folium.GeoJsonPopup(fields=["popup"], labels=False),
+    ).add_to(m)
+    return m
+
+
+def get_marker_shape(green_values):
+    """Bepaalt de vorm van de markers op basis van de groenwaarden (hele kolom tegelijk)"""
+    green_values = np.asarray(green_values, dtype=float)
+    return np.select(
+        [green_values <= 3, green_values <= 6],
+        ['square', 'triangle'],  # Laag groenaanbod krijgt een vierkant, gemiddeld een driehoek
+        default='circle'         # Hoog groenaanbod krijgt een cirkel
+    )
+
+
+def get_marker_color(green_values):
+    """Bepaalt de kleur van de markers op basis van de groenwaarden (hele kolom tegelijk)"""
+    green_values = np.asarray(green_values, dtype=float)
+    return np.select(
+        [green_values <= 3, green_values <= 6],
+        ["red", "orange"],  # Laag groen = rood, gemiddeld groen = oranje
+        default="green"     # Hoog groen = groen
+    )
+
+
+def groen_marker_map(gdf, zoom=DEFAULT_ZOOM):
+    """Markers voor het groenaanbod, in één MarkerCluster die in de browser wordt opgebouwd."""
+    m = folium.Map(location=[52.3776, 4.9141], zoom_start=zoom)
+    green_values = gdf["Aanbod groen (1-10)"]
+    marker_rows = pd.DataFrame({
+        "lat": gdf["LAT"],
+        "lng": gdf["LNG"],
+        "color": get_marker_color(green_values),
+        "icon": get_marker_shape(green_values),
+        "popup": "<b>Buurt:</b> " + gdf["Buurt"].astype(str) + "<br><b>Aanbod groen:</b> " + green_values.astype(str)
+                 + np.where(gdf[IMPUTED_FLAGS["Aanbod groen (1-10)"]], " (geschat)", ""),
+    })
+    FastMarkerCluster(marker_rows.to_numpy().tolist(), callback=AWESOME_MARKER_CALLBACK).add_to(m)
+    return m
+
+
+def categorize_green_offer(green_value):
+    """Deelt het groenaanbod in ten opzichte van het stedelijk gemiddelde."""
+    if pd.isna(green_value):  # Als de waarde ontbreekt
+        return 'Geen gegevens'
+    elif green_value > 7.5:
+        return 'Veel beter dan gemiddeld'
+    elif 7.3 <= green_value <= 7.5:
+        return 'Beter dan gemiddeld'
+    elif 6.6 <= green_value <= 7.2:
+        return 'Rond het stedelijk gemiddelde'
+    elif 6.3 <= green_value <= 6.5:
+        return 'Slechter dan gemiddeld'
+    else:
+        return 'Veel slechter dan gemiddeld'
+
+
+def groen_colors(gdf):
+    return gdf['Aanbod groen (1-10)'].apply(categorize_green_offer).map(CATEGORY_COLORS)
+
+
+def groen_map(gdf, zoom=DEFAULT_ZOOM, tiles=False):
+    """Buurten gekleurd naar categorie van het groenaanbod, met legenda."""
+    m = folium.Map(location=[52.3776, 4.9141], zoom_start=zoom)
+    m.get_root().html.add_child(folium.Element(GROEN_LEGEND))
+    if tiles:
+        add_tile_layer(m, "groen", "Groenaanbod per Buurt")
+        return m
+    gdf = gdf.assign(Color=groen_colors(gdf))
+
+    # Gegevens per Buurtcode, één keer opgebouwd en gedeeld door style- en popupfunctie
+    groen_lookup = feature_lookup(gdf, ["Buurt", "Color", "Aanbod groen (1-10)", IMPUTED_FLAGS["Aanbod groen (1-10)"]])
+
+    def style_function(feature):
+        buurt = groen_lookup.get(feature['properties']['Buurtcode'])
+        color = buurt['Color'] if buurt else 'white'  # Wit als de buurt niet in de data zit
+        return {
+            'fillColor': color,
+            'color': 'black',  # Rand van de buurten zwart maken
+            'weight': 0.5,
+            'fillOpacity': 0.7
+        }
+
+    def popup_function(feature):
+        buurtnaam = feature['properties']['Buurt']
+        buurt = groen_lookup.get(feature['properties']['Buurtcode'])
+        if buurt and not pd.isna(buurt['Aanbod groen (1-10)']):
+            geschat = " (geschat: mediaan van de omgeving)" if buurt[IMPUTED_FLAGS['Aanbod groen (1-10)']] else ""
+            return f"<b>{buurtnaam}</b><br>Aanbod groen: {buurt['Aanbod groen (1-10)']:.1f}{geschat}"
+        return f"<b>{buurtnaam}</b><br>Geen gegevens beschikbaar"
+
+    topology = set_feature_property(slim_topojson(gdf, ["Buurtcode", "Buurt"], zoom), "popup", popup_function)
+    layer = folium.TopoJson(
+        topology,
+        f"objects.{TOPO_OBJECT}",
+        name="Groenaanbod per Buurt",
+        style_function=style_function,
+        tooltip=folium.GeoJsonTooltip(
+            fields=["Buurt"],
+            aliases=["Buurt:"],
+            sticky=True
+        )
+    )
+    layer.add_child(folium.GeoJsonPopup(fields=["popup"], labels=False))
+    layer.add_to(m)
+    return m
+
+
+def aardgasvrij_map(gdf, zoom=DEFAULT_ZOOM, tiles=False):
+    """Choropleth van de aardgasvrije woningequivalenten, met legenda."""
+    m = folium.Map(location=AMSTERDAM, zoom_start=zoom)
+    m.get_root().html.add_child(folium.Element(AARDGASVRIJ_LEGEND))
+    if tiles:
+        add_tile_layer(m, "aardgasvrij", "Aardgasvrije woningequivalenten")
+        bins = choropleth_bins(gdf["aardgasvrije woningequivalenten"])
+        step_colormap(bins, "PuBu", "Aardgasvrije woningequivalenten").add_to(m)
+        return m
+    add_choropleth(
+        m, gdf.assign(Geschat=imputed_note(gdf, ["aardgasvrije woningequivalenten"])),
+        "aardgasvrije woningequivalenten", "PuBu", "Aardgasvrije woningequivalenten",
+        tooltip=(
+            ["Buurt", "aardgasvrije woningequivalenten"],
+            ["Buurt:", "Aardgasvrije Woningequivalenten:"],
+        ),
+        popup=(
+            ["Buurt", "aardgasvrije woningequivalenten", "Duurzaamheidsindex", "Geschat"],
+            ["Buurt:", "Aardgasvrije Woningequivalenten:", "Duurzaamheidsindex:", IMPUTED_ALIAS],
+        ),
+        zoom=zoom,
+    )
+    return m
+
+
+def energielabel_map(gdf, zoom=DEFAULT_ZOOM, tiles=False):
+    """Buurten gekleurd naar het dominante energielabel."""
+    m = folium.Map(location=[52.3676, 4.9041], zoom_start=zoom)
+    if tiles:
+        add_tile_layer(m, "energielabel", "Energielabels", opacity=0.6)
+        return m
+    gdf = gdf.assign(Dominant_Label=dominant_label(gdf))
+    gdf["Color"] = gdf["Dominant_Label"].map(LABEL_COLORS)
+    add_energielabel_layer(m, gdf, zoom)
+    return m
+
+
+def comparison_map(buurten, energielabels, zoom=DEFAULT_ZOOM):
+    """Indexkaart en energielabelkaart naast elkaar, gekoppeld in positie en zoom.
+
+    Beide kaarten gebruiken dezelfde buurtgrenzen, die één keer in de
+    pagina staan; de gegevens van beide zijn op Buurtcode samengevoegd. De
+    indexkant is te herkleuren zoals `index_map`.
+    """
+    labels = energielabels[["Buurtcode", *LABEL_COLUMNS.values()]]
+    gdf = buurten[["Buurtcode", "Buurt", "Duurzaamheidsindex", "geometry"]].merge(labels, on="Buurtcode", how="left")
+    has_label = gdf[list(LABEL_COLUMNS.values())].notna().any(axis=1)
+
+    bins = choropleth_bins(gdf["Duurzaamheidsindex"])
+    gdf["index_color"] = step_colors(gdf["Duurzaamheidsindex"], bins, "YlGn")
+    gdf["Dominant_Label"] = dominant_label(gdf).where(has_label)
+    gdf["label_color"] = gdf["Dominant_Label"].map(LABEL_COLORS)
+    gdf["Duurzaamheidsindex"] = gdf["Duurzaamheidsindex"].round(3)
+
+    label_fields = ["Buurt", "Dominant_Label", *LABEL_COLUMNS.values()]
+    dual = DualMap(location=AMSTERDAM, zoom_start=zoom, layout="horizontal")
+    shared = SharedTopoJson(slim_topojson(
+        gdf, ["Buurtcode", "Duurzaamheidsindex", "index_color", "label_color", *label_fields], zoom,
+    )).add_to(dual.m1)
+
+    index_layer = SharedLayer(
+        shared, "index_color", ["Buurt", "Duurzaamheidsindex"], ["Buurt:", "Duurzaamheidsindex:"],
+        0.7, {"color": "black", "opacity": 0.2},
+    ).add_to(dual.m1)
+    step_colormap(bins, "YlGn", "Duurzaamheidsindex (0-1)").add_to(dual.m1)
+    ColorReceiver(index_layer).add_to(dual.m1)
+
+    SharedLayer(
+        shared, "label_color", label_fields, ["Buurt:", "Dominant label:", *(f"{label} (%):" for label in LABEL_COLUMNS)],
+        0.6, {"color": "black", "weight": 0.5},
+    ).add_to(dual.m2)
+    return dual
+
+
+def select_areas(frame, stadsdeel=None, gebied=None):
+    """De gebieden uit een niveau van de kengetallentabel binnen een stadsdeel en/of gebied."""
+    if stadsdeel is not None:
+        frame = frame[frame["Stadsdeelcode"] == stadsdeel]
+    if gebied is not None:
+        frame = frame[frame["Gebiedcode"] == gebied]
+    return frame
+
+
+def level_map(level, indicator, statistic="mean", stadsdeel=None, gebied=None, zoom=DEFAULT_ZOOM):
+    """Choropleth van een kengetal op niveau `level`, eventueel binnen één stadsdeel of gebied."""
+    frame = select_areas(read_aggregates(level), stadsdeel, gebied)
+    column = statistic_column(indicator, statistic)
+    label = f"{indicator} ({STATISTICS[statistic].lower()})"
+    fields = (["naam", column], [f"{level}:", f"{label}:"])
+    m = folium.Map(location=AMSTERDAM, zoom_start=zoom)
+    if frame.empty:
+        return m
+    # De geometrie in de tabel is al vereenvoudigd; geen opzoeking per buurt
+    add_choropleth(m, frame, column, "YlGn", label, tooltip=fields, popup=fields, key="code", zoom=None)
+    if stadsdeel is not None or gebied is not None:
+        m.fit_bounds([frame.total_bounds[[1, 0]].tolist(), frame.total_bounds[[3, 2]].tolist()])
+    return m
+
+
+# Bovengrens van de HTML-cache (som van de paginagroottes)
+HTML_CACHE_BYTES = 64 * 1024 * 1024
+
+_html_cache = OrderedDict()
+_html_cache_bytes = 0
+_html_lock = threading.Lock()
+
+
+def map_data_version():
+    """Dataversie van alle kaarten, voor de sleutel van `map_html`."""
+    return data_version(*MAP_DATA_FILES)
+
+
+def map_html(builder, version, *frames, **params):
+    """Gerenderde HTML van `builder(*frames, **params)`, gedeeld door alle sessies.
+
+    De sleutel is de naam van de bouwer, `version` en `params`; de frames
+    zelf tellen niet mee, die worden vertegenwoordigd door `version`. Zo
+    betaalt alleen de eerste bezoeker na een dataverversing het bouwen. De
+    minst recent gebruikte pagina's vallen af zodra de cache groter wordt
+    dan `HTML_CACHE_BYTES`.
+    """
+    global _html_cache_bytes
+    key = (builder.__name__, version, tuple(sorted(params.items())))
+    with _html_lock:
+        if key in _html_cache:
+            _html_cache.move_to_end(key)
+            return _html_cache[key]
+
+    page = builder(*frames, **params).get_root().render()
+
+    with _html_lock:
+        if key not in _html_cache:
+            _html_cache[key] = page
+            _html_cache_bytes += len(page)
+        while _html_cache_bytes > HTML_CACHE_BYTES and len(_html_cache) > 1:
+            _, evicted = _html_cache.popitem(last=False)
+            _html_cache_bytes -= len(evicted)
+    return page
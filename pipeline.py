@@ -0,0 +1,357 @@
+"""Incrementele pipeline die de Duurzaamheidsindex opbouwt uit de ruwe bronnen.
+
+Elke stap declareert van welke bestanden en andere stappen hij afhangt.
+Het resultaat van een stap wordt in `.pipeline_cache/` bewaard, samen met
+een stempel: de hash van de code van de pipeline (deze module en de
+hulpmodules in `CODE_FILES`, dus ook constanten en hulpfuncties) plus de
+hashes van al zijn invoer. Bij een volgende run worden alleen de stappen herberekend waarvan
+de stempel is veranderd, en de stappen die daarvan afhangen.
+
+Alle bestanden worden via een tijdelijk bestand geschreven, en de stempel
+als laatste; daarin staan ook de hashes van de doelbestanden. Een
+onderbroken run laat zo geen half doelbestand achter, en een doelbestand
+dat ontbreekt of is gewijzigd wordt uit de cache opnieuw geschreven.
+
+Gebruik:
+
+    python pipeline.py            # bouw alle doelbestanden bij
+    python pipeline.py --force    # negeer de cache en bouw alles opnieuw
+    python pipeline.py energielabels  # bouw alleen de genoemde stap(pen)
+
+De aantallen zonnepanelen, de warmtepompenergie en de aardgasvrije
+woningequivalenten hebben geen ruwe bron in deze repository; die worden
+gelezen uit `gdf_result1.csv` (zonder de overgebleven `_merge`-kolom).
+"""
+
+import argparse
+import hashlib
+import os
+import pickle
+import time
+from dataclasses import dataclass, field
+
+import geopandas as gpd  # type: ignore
+import numpy as np
+import pandas as pd
+
+from aggregates import build_aggregates
+from constants import IMPUTED_FLAGS, INDEX_WEIGHTS
+from geometry import build_geometry_lod
+from loaders import clear_cache, file_digest
+from reconcile import reconcile
+
+CACHE_DIR = ".pipeline_cache"
+
+# Code waarvan de stappen afhangen; een wijziging daarin maakt alle stempels ongeldig
+CODE_FILES = ("pipeline.py", "constants.py", "aggregates.py", "geometry.py", "reconcile.py", "loaders.py")
+
+JAAR_GROEN = 2023
+JAAR_LABELS = 2024
+
+# Kolommen die als categorie worden opgeslagen in het kolombestand
+CATEGORICAL_COLUMNS = ["Stadsdeel", "Gebied", "Wijk"]
+
+# Dubbele geometrie als tekst; alleen nog in de GeoJSON-export
+WKT_COLUMNS = ["WKT_LNG_LAT", "WKT_LAT_LNG"]
+
+LABEL_COLUMNS = [
+    "Energielabel E t/m G (%)",
+    "Energielabel C t/m D (%)",
+    "Energielabel A++++ t/m B (%)",
+]
+
+@dataclass
+class Step:
+    name: str
+    func: object
+    files: list = field(default_factory=list)
+    deps: list = field(default_factory=list)
+    targets: list = field(default_factory=list)
+
+
+STEPS = {}
+
+
+def step(files=(), deps=(), targets=()):
+    """Registreert een functie als pipelinestap.
+
+    De functie krijgt de resultaten van `deps` als argumenten, in dezelfde
+    volgorde. Het resultaat wordt ook naar elk bestand in `targets`
+    geschreven (GeoParquet of GeoJSON, op basis van de extensie).
+    """
+    def register(func):
+        STEPS[func.__name__] = Step(func.__name__, func, list(files), list(deps), list(targets))
+        return func
+    return register
+
+
+def _read_indicator(path, column, jaar):
+    """Leest een indicatorbestand van OIS (tabblad `data`) voor één jaar."""
+    data = pd.read_excel(path, sheet_name="data")
+    data = data[(data["Jaar"] == jaar) & (data["Gebiedsindeling"] == "buurten")]
+    return data[["Code", column]].rename(columns={"Code": "Buurtcode"}).reset_index(drop=True)
+
+
+def _fill_hierarchical(frame, column):
+    """Vult ontbrekende waarden met de mediaan van de wijk, dan het gebied, dan het stadsdeel."""
+    values = frame[column]
+    for level in ("Wijkcode", "Gebiedcode", "Stadsdeelcode"):
+        values = values.fillna(frame.groupby(level)[column].transform("median"))
+    return values.fillna(frame[column].median())
+
+
+@step(files=["INDELING_BUURT.csv"])
+def indeling():
+    data = pd.read_csv("INDELING_BUURT.csv", sep=";")
+    return gpd.GeoDataFrame(
+        data,
+        geometry=gpd.GeoSeries.from_wkt(data["WKT_LNG_LAT"]),
+        crs="EPSG:4326",
+    )
+
+
+@step(files=["ORGROEN_R-2023-buurten.xlsx"])
+def groen():
+    return _read_indicator("ORGROEN_R-2023-buurten.xlsx", "Aanbod groen (1-10)", JAAR_GROEN)
+
+
+@step(files=["Isolatie- 2024-buurten-zonder lat.xlsx"])
+def label_ab():
+    return _read_indicator("Isolatie- 2024-buurten-zonder lat.xlsx", "Energielabel A++++ t/m B (%)", JAAR_LABELS)
+
+
+@step(files=["WLABELCD_P-2024-buurten.xlsx"])
+def label_cd():
+    return _read_indicator("WLABELCD_P-2024-buurten.xlsx", "Energielabel C t/m D (%)", JAAR_LABELS)
+
+
+@step(files=["WLABELEFG_P-2024-buurten.xlsx"])
+def label_efg():
+    return _read_indicator("WLABELEFG_P-2024-buurten.xlsx", "Energielabel E t/m G (%)", JAAR_LABELS)
+
+
+@step(files=["AARDGASVRIJ.csv"])
+def aardgasvrij():
+    data = pd.read_csv("AARDGASVRIJ.csv", sep=";")
+    return gpd.GeoDataFrame(
+        data[["buurt_code", "buurt_naam", "toelichting"]],
+        geometry=gpd.GeoSeries.from_wkt(data["WKT_LNG_LAT"]),
+        crs="EPSG:4326",
+    )
+
+
+@step(files=["gdf_result1.csv"])
+def bestaande_indicatoren():
+    data = pd.read_csv(
+        "gdf_result1.csv",
+        usecols=["Buurtcode", "aardgasvrije woningequivalenten", "nl2023_panelen.1", "nl2023_wp"],
+    )
+    return data.rename(columns={
+        "nl2023_panelen.1": "aantal_zonnepanelen",
+        "nl2023_wp": "hoeveelheid_wp_energie",
+    })
+
+
+@step(deps=["indeling", "aardgasvrij"])
+def aardgasvrij_koppeling(indeling, aardgasvrij):
+    """Koppelt de aardgasvrij-toelichting aan de buurtindeling.
+
+    Eerst op CBS-code; buurten die daarop niet matchen (AARDGASVRIJ.csv
+    gebruikt een oudere nummering) worden gekoppeld op de overlap van de
+    buurtgrenzen, en wat dan nog open is op naam. Hoe er gekoppeld is, staat in `aardgasvrij_match` en
+    `aardgasvrij_match_aandeel`.
+    """
+    matched = reconcile(indeling, aardgasvrij, "CBS_Buurtcode", "buurt_code", ["toelichting"],
+                        names=("Buurt", "buurt_naam"))
+    return pd.DataFrame({
+        "Buurtcode": indeling["Buurtcode"],
+        "aardgasvrij_toelichting": matched["toelichting"],
+        "aardgasvrij_match": matched["match"],
+        "aardgasvrij_match_aandeel": matched["match_aandeel"].round(3),
+    })
+
+
+@step(deps=["indeling", "groen", "bestaande_indicatoren", "aardgasvrij_koppeling"],
+      targets=["buurten.parquet", "output.geojson"])
+def duurzaamheidsindex(indeling, groen, bestaande_indicatoren, aardgasvrij_koppeling):
+    gdf = indeling.merge(groen, on="Buurtcode", how="left")
+    gdf = gdf.merge(bestaande_indicatoren, on="Buurtcode", how="left")
+    gdf = gdf.merge(aardgasvrij_koppeling, on="Buurtcode", how="left")
+
+    # Geschatte waarden blijven herkenbaar aan hun `*_imputed`-kolom
+    for column, flag in IMPUTED_FLAGS.items():
+        gdf[flag] = gdf[column].isna()
+        gdf[column] = _fill_hierarchical(gdf, column)
+    gdf["aardgasvrije woningequivalenten"] = gdf["aardgasvrije woningequivalenten"].round(3)
+    gdf["aantal_zonnepanelen"] = gdf["aantal_zonnepanelen"].round().astype(int)
+    gdf["hoeveelheid_wp_energie"] = gdf["hoeveelheid_wp_energie"].round().astype(int)
+
+    gdf["Groeneaanbod_normalized"] = gdf["Aanbod groen (1-10)"] / 10
+    gdf["Aardgasvrije_normalized"] = gdf["aardgasvrije woningequivalenten"]
+    gdf["Zonnepanelen_normalized"] = gdf["aantal_zonnepanelen"] / gdf["aantal_zonnepanelen"].max()
+    gdf["Duurzaamheidsindex"] = np.sum(
+        [gdf[column].to_numpy() * weight for column, weight in INDEX_WEIGHTS.items()], axis=0
+    )
+    return gdf
+
+
+@step(deps=["indeling", "label_efg", "label_cd", "label_ab"],
+      targets=["energielabels.parquet", "combined_data1.geojson"])
+def energielabels(indeling, label_efg, label_cd, label_ab):
+    gdf = indeling
+    for labels in (label_efg, label_cd, label_ab):
+        gdf = gdf.merge(labels, on="Buurtcode", how="left")
+    # Alleen buurten waarvoor minstens één labelaandeel bekend is
+    return gdf[gdf[LABEL_COLUMNS].notna().any(axis=1)].reset_index(drop=True)
+
+
+@step(deps=["indeling"], targets=["buurten_lod.parquet"])
+def geometrie_lod(indeling):
+    return build_geometry_lod(indeling)
+
+
+@step(deps=["duurzaamheidsindex"], targets=["aggregaten.parquet"])
+def aggregaten(duurzaamheidsindex):
+    return build_aggregates(duurzaamheidsindex)
+
+
+def _to_columnar(frame):
+    """Maakt een frame klaar voor GeoParquet: zonder WKT-tekst en met categorische gebiedsnamen."""
+    frame = frame.drop(columns=WKT_COLUMNS, errors="ignore")
+    for column in CATEGORICAL_COLUMNS:
+        if column in frame:
+            frame[column] = frame[column].astype("category")
+    return frame
+
+
+def _replace(path, write):
+    """Schrijft `path` met `write(tijdelijk pad)` en zet het daarna in één keer op zijn plaats."""
+    tmp = path + ".tmp"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    write(tmp)
+    os.replace(tmp, path)
+
+
+def _write_target(frame, path):
+    if path.endswith(".parquet"):
+        _replace(path, lambda tmp: _to_columnar(frame).to_parquet(tmp, index=False))
+    else:
+        # De laagnaam blijft die van het doelbestand, niet van het tijdelijke bestand
+        layer = os.path.splitext(os.path.basename(path))[0]
+        _replace(path, lambda tmp: frame.to_file(tmp, driver="GeoJSON", layer=layer))
+
+
+def _write_pickle(value, path):
+    def write(tmp):
+        with open(tmp, "wb") as f:
+            pickle.dump(value, f)
+    _replace(path, write)
+
+
+def _write_text(text, path):
+    def write(tmp):
+        with open(tmp, "w") as f:
+            f.write(text)
+    _replace(path, write)
+
+
+def code_digest():
+    """Hash van alle bestanden in `CODE_FILES`."""
+    h = hashlib.blake2b(digest_size=16)
+    for path in CODE_FILES:
+        h.update(file_digest(os.path.join(os.path.dirname(os.path.abspath(__file__)), path)).encode())
+    return h.hexdigest()
+
+
+def _stamp(s, code, dep_stamps):
+    h = hashlib.blake2b(digest_size=16)
+    h.update(s.name.encode())
+    h.update(code.encode())
+    for path in s.files:
+        h.update(file_digest(path).encode())
+    for dep in s.deps:
+        h.update(dep_stamps[dep].encode())
+    return h.hexdigest()
+
+
+class Pipeline:
+    """Voert stappen uit in afhankelijkheidsvolgorde en slaat ongewijzigde stappen over."""
+
+    def __init__(self, cache_dir=CACHE_DIR, force=False):
+        self.cache_dir = cache_dir
+        self.force = force
+        self.code = code_digest()
+        self.stamps = {}
+        self.results = {}
+        self.log = []
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _paths(self, name):
+        base = os.path.join(self.cache_dir, name)
+        return base + ".pkl", base + ".stamp"
+
+    def run(self, name):
+        """Geeft het resultaat van stap `name` en berekent het alleen als het nodig is."""
+        if name in self.results:
+            return self.results[name]
+        s = STEPS[name]
+        for dep in s.deps:
+            self.run(dep)
+
+        stamp = _stamp(s, self.code, self.stamps)
+        result_path, stamp_path = self._paths(name)
+        cached = not self.force and os.path.exists(result_path) and os.path.exists(stamp_path)
+        written = {}
+        if cached:
+            # Eerste regel: de stempel; daarna per doelbestand "hash pad"
+            with open(stamp_path) as f:
+                saved, *lines = f.read().split("\n")
+            cached = saved == stamp
+            written = dict(reversed(line.split(" ", 1)) for line in lines)
+
+        start = time.perf_counter()
+        if cached:
+            with open(result_path, "rb") as f:
+                result = pickle.load(f)
+        else:
+            result = s.func(*(self.results[dep] for dep in s.deps))
+        # Doelbestanden eerst, de stempel als laatste
+        stale = [target for target in s.targets
+                 if not cached or not os.path.exists(target) or file_digest(target) != written.get(target)]
+        for target in stale:
+            _write_target(result, target)
+        if not cached:
+            _write_pickle(result, result_path)
+        if stale or not cached:
+            _write_text("\n".join([stamp, *(f"{file_digest(target)} {target}" for target in s.targets)]), stamp_path)
+        self.log.append((name, "cache" if cached else "herberekend", time.perf_counter() - start))
+
+        self.stamps[name] = stamp
+        self.results[name] = result
+        return result
+
+    def build(self, names=None):
+        """Bouwt de opgegeven stappen, of standaard alle stappen met een doelbestand."""
+        names = names or [name for name, s in STEPS.items() if s.targets]
+        for name in names:
+            self.run(name)
+        clear_cache()
+        return self.log
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bouw de Duurzaamheidsindex uit de ruwe bronnen.")
+    parser.add_argument("steps", nargs="*", help="stappen om te bouwen: " + ", ".join(STEPS))
+    parser.add_argument("--force", action="store_true", help="negeer de cache en bouw alles opnieuw")
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.steps if name not in STEPS]
+    if unknown:
+        parser.error("onbekende stap(pen): " + ", ".join(unknown))
+
+    for name, status, seconds in Pipeline(force=args.force).build(args.steps):
+        print(f"{name:<24} {status:<12} {seconds:6.2f}s")
+
+
+if __name__ == "__main__":
+    main()
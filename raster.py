@@ -0,0 +1,77 @@
+"""Dichtheidsraster van een buurtindicator, als afbeelding voor op de kaart.
+
+Elke rastercel krijgt de dichtheid (per km²) van de buurt waarin het
+midden van de cel ligt. Het raster ligt regelmatig in Web Mercator, de
+projectie van de kaart, zodat Leaflet het als één `ImageOverlay` zonder
+vervorming kan tonen. De browser tekent alleen nog een PNG; er is geen
+dichtheidsschatting meer in de browser.
+"""
+
+import base64
+import io
+
+import numpy as np
+import shapely  # type: ignore
+from branca.colormap import linear  # type: ignore
+from PIL import Image  # type: ignore
+from pyproj import Transformer  # type: ignore
+
+WEB_MERCATOR = "EPSG:3857"
+
+# Celgrootte in Web Mercator-eenheden; op de breedte van Amsterdam ca. 37 m
+CELL_SIZE = 60
+
+# Bovengrens van de kleurschaal, als percentiel van de buurtdichtheden
+VMAX_PERCENTILE = 95
+
+
+def density(gdf, column):
+    """Waarde van `column` per km² buurtoppervlak (`Oppervlakte_m2`)."""
+    return gdf[column].to_numpy(dtype=float) / (gdf["Oppervlakte_m2"].to_numpy(dtype=float) / 1e6)
+
+
+def density_grid(gdf, values, cell_size=CELL_SIZE):
+    """Raster met per cel de waarde van de buurt onder het celmidden.
+
+    Geeft het raster (rijen van noord naar zuid, NaN buiten de buurten) en
+    de grenzen als [[zuid, west], [noord, oost]] in graden.
+    """
+    geoms = np.asarray(gdf.to_crs(WEB_MERCATOR).geometry.values)
+    xmin, ymin, xmax, ymax = shapely.total_bounds(geoms)
+    n_cols = int(np.ceil((xmax - xmin) / cell_size))
+    n_rows = int(np.ceil((ymax - ymin) / cell_size))
+    xs = xmin + (np.arange(n_cols) + 0.5) * cell_size
+    ys = ymax - (np.arange(n_rows) + 0.5) * cell_size
+    x, y = np.meshgrid(xs, ys)
+
+    tree = shapely.STRtree(geoms)
+    cell_idx, geom_idx = tree.query(shapely.points(x.ravel(), y.ravel()), predicate="intersects")
+    grid = np.full(x.size, np.nan)
+    grid[cell_idx] = np.asarray(values, dtype=float)[geom_idx]
+
+    to_lnglat = Transformer.from_crs(WEB_MERCATOR, "EPSG:4326", always_xy=True)
+    west, south = to_lnglat.transform(xmin, ymax - n_rows * cell_size)
+    east, north = to_lnglat.transform(xmin + n_cols * cell_size, ymax)
+    return grid.reshape(n_rows, n_cols), [[south, west], [north, east]]
+
+
+def density_colormap(values, caption):
+    """Kleurschaal van 0 tot het `VMAX_PERCENTILE`-percentiel van `values`."""
+    vmax = float(np.nanpercentile(values, VMAX_PERCENTILE))
+    colormap = linear.YlOrRd_09.scale(0, vmax)
+    colormap.caption = caption
+    return colormap
+
+
+def grid_to_png(grid, colormap, levels=256):
+    """Kleurt het raster via een opzoektabel en geeft een PNG als data-URL; NaN wordt transparant."""
+    steps = np.linspace(colormap.vmin, colormap.vmax, levels)
+    lut = np.array([colormap.rgba_bytes_tuple(value) for value in steps], dtype=np.uint8)
+    scaled = (grid - colormap.vmin) / (colormap.vmax - colormap.vmin) * (levels - 1)
+    index = np.clip(np.nan_to_num(scaled), 0, levels - 1).astype(int)
+    rgba = lut[index]
+    rgba[np.isnan(grid), 3] = 0
+
+    buffer = io.BytesIO()
+    Image.fromarray(rgba, mode="RGBA").save(buffer, format="PNG")
+    return "data:image/png;base64," + base64.b64encode(buffer.getvalue()).decode()
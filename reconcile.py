@@ -0,0 +1,94 @@
+"""Koppeling van een bron met eigen buurtcodes aan de buurtindeling.
+
+Eerst wordt op code gekoppeld. Buurten die daarmee niet gevonden worden
+(een andere of oudere nummering, samengevoegde of gesplitste buurten)
+worden gekoppeld via de overlap van de polygonen: een `STRtree` over de
+bron levert per buurt alleen de kandidaten waarvan de omhullende overlapt,
+en alleen voor die paren wordt het oppervlak van de doorsnede berekend.
+
+Per buurt wordt vastgelegd hoe er gekoppeld is (`match`: code, overlap,
+naam of geen) en welk deel van het buurtoppervlak de gekoppelde bron bedekt
+(`match_aandeel`). Een buurt die over meerdere bronvlakken verdeeld is,
+wordt op overlap gekoppeld als die vlakken samen genoeg bedekken; de
+waarden komen dan van het grootste vlak.
+"""
+
+import numpy as np
+import pandas as pd
+import shapely  # type: ignore
+
+# Vlakkenprojectie voor oppervlakteberekeningen (RD New)
+AREA_CRS = "EPSG:28992"
+
+# Minimaal aandeel van het buurtoppervlak dat de bron samen bedekt, voor een koppeling op overlap
+MIN_OVERLAP = 0.5
+
+
+def overlay_pairs(target, source):
+    """Alle overlappende paren (doel, bron) met het oppervlak van hun doorsnede in m².
+
+    Geeft drie arrays terug: posities in `target`, posities in `source` en
+    het oppervlak; paren die elkaar alleen raken vallen weg.
+    """
+    target_geoms = np.asarray(target.to_crs(AREA_CRS).geometry.values)
+    source_geoms = np.asarray(source.to_crs(AREA_CRS).geometry.values)
+    tree = shapely.STRtree(source_geoms)
+    target_idx, source_idx = tree.query(target_geoms, predicate="intersects")
+    area = shapely.area(shapely.intersection(target_geoms[target_idx], source_geoms[source_idx]))
+    keep = area > 0
+    return target_idx[keep], source_idx[keep], area[keep]
+
+
+def reconcile(target, source, target_code, source_code, columns, names=None, min_overlap=MIN_OVERLAP):
+    """Koppelt `columns` uit `source` aan elke rij van `target`.
+
+    Op code gaat voor; anders wint de bron met de grootste overlap, mits
+    alle overlappende bronnen samen minstens `min_overlap` van de buurt
+    bedekken. Met `names` (paar kolomnamen in doel en bron) wordt wat dan
+    nog open is op naam gekoppeld, als laatste redmiddel. Geeft een frame
+    met dezelfde index als `target`, plus `match`, `match_aandeel` (het
+    aandeel van de buurt dat de gekoppelde bron bedekt: 1 op code, NaN op
+    naam, 0 zonder koppeling) en de gekoppelde `source_code`.
+    """
+    position = pd.Series(np.arange(len(source)), index=source[source_code].to_numpy())
+    position = position[~position.index.duplicated()]
+    matched = target[target_code].map(position).to_numpy()
+
+    result = pd.DataFrame(index=target.index)
+    result["match"] = np.where(pd.notna(matched), "code", "geen")
+    result["match_aandeel"] = np.where(pd.notna(matched), 1.0, 0.0)
+    chosen = np.where(pd.notna(matched), matched, -1).astype(int)
+
+    open_rows = np.flatnonzero(pd.isna(matched))
+    if len(open_rows):
+        target_idx, source_idx, area = overlay_pairs(target.iloc[open_rows], source)
+        target_area = shapely.area(np.asarray(target.iloc[open_rows].to_crs(AREA_CRS).geometry.values))
+        share = area / target_area[target_idx]
+
+        # Per buurt de bron met de grootste overlap; de dekking telt over alle bronnen
+        order = np.lexsort((-share, target_idx))
+        first = np.unique(target_idx[order], return_index=True)[1]
+        best = order[first]
+        coverage = np.bincount(target_idx, share, minlength=len(open_rows))[target_idx[best]]
+        good = coverage >= min_overlap
+        rows = open_rows[target_idx[best]]
+        chosen[rows[good]] = source_idx[best][good]
+        result.iloc[rows, result.columns.get_loc("match")] = np.where(good, "overlap", "geen")
+        result.iloc[rows, result.columns.get_loc("match_aandeel")] = np.where(good, share[best], 0.0)
+
+    if names is not None:
+        target_name, source_name = names
+        by_name = pd.Series(np.arange(len(source)), index=source[source_name].to_numpy())
+        by_name = by_name[~by_name.index.duplicated()]
+        named = target[target_name].map(by_name).to_numpy()
+        use = (chosen < 0) & pd.notna(named)
+        chosen[use] = named[use].astype(int)
+        result.loc[use, "match"] = "naam"
+        result.loc[use, "match_aandeel"] = np.nan
+
+    found = chosen >= 0
+    result[source_code] = np.where(found, source[source_code].to_numpy()[chosen], None)
+    for column in columns:
+        values = source[column].to_numpy()[chosen].astype(object)
+        result[column] = np.where(found, values, None)
+    return result
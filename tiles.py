@@ -0,0 +1,175 @@
+"""Vooraf gerenderde tegelpiramides van de buurtkaarten.
+
+Een kaart met tegels stuurt geen buurtgrenzen meer mee: de browser laadt
+alleen de PNG-tegels van het zichtbare deel. De kleuren zijn dezelfde als
+die van de folium-kaarten (`YlGn`/`PuBu`-klassen, groencategorieën en
+dominant energielabel); de tegels worden bemonsterd op de pixelmiddens
+met een `STRtree`, met een dunne rand waar de buurt wisselt.
+
+Gebruik:
+
+    python tiles.py                    # alle lagen, zoom 10 t/m 14
+    python tiles.py groen --max-zoom 15
+
+Elke zoomstap van elke laag is een eigen taak in een procespool. De tegels
+komen in `static/tiles/<laag>/<z>/<x>/<y>.png`, die bij elke run van die
+laag eerst wordt leeggemaakt; zet in `.streamlit/config.toml`
+`enableStaticServing` aan om ze te serveren.
+"""
+
+import argparse
+import json
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import shapely  # type: ignore
+from matplotlib.colors import to_rgb
+from PIL import Image  # type: ignore
+
+from loaders import read_buurten, read_energielabels
+from maps import (
+    LABEL_COLORS, TILES_DIR, choropleth_bins, dominant_label, groen_colors, map_data_version, step_colors,
+)
+
+TILE_SIZE = 256
+
+# Halve omtrek van de wereld in Web Mercator (m)
+ORIGIN_SHIFT = 20037508.342789244
+
+# Rand tussen buurten: zwart, deels doorzichtig
+BORDER_ALPHA = 90
+
+
+def _index_layer():
+    gdf = read_buurten(columns=["Duurzaamheidsindex"])
+    values = gdf["Duurzaamheidsindex"]
+    return gdf, step_colors(values, choropleth_bins(values), "YlGn")
+
+
+def _aardgasvrij_layer():
+    gdf = read_buurten(columns=["aardgasvrije woningequivalenten"])
+    values = gdf["aardgasvrije woningequivalenten"]
+    return gdf, step_colors(values, choropleth_bins(values), "PuBu")
+
+
+def _groen_layer():
+    gdf = read_buurten(columns=["Aanbod groen (1-10)"])
+    return gdf, groen_colors(gdf).to_numpy()
+
+
+def _energielabel_layer():
+    gdf = read_energielabels(columns=[
+        "Energielabel A++++ t/m B (%)", "Energielabel C t/m D (%)", "Energielabel E t/m G (%)",
+    ])
+    return gdf, dominant_label(gdf).map(LABEL_COLORS).to_numpy()
+
+
+# Laag -> functie die (buurten, kleur per buurt) geeft
+LAYERS = {
+    "duurzaamheidsindex": _index_layer,
+    "aardgasvrij": _aardgasvrij_layer,
+    "groen": _groen_layer,
+    "energielabel": _energielabel_layer,
+}
+
+
+def tile_range(bounds, zoom):
+    """Tegelnummers (x0, x1, y0, y1), inclusief, die de Web Mercator-grenzen `bounds` bedekken."""
+    size = 2 * ORIGIN_SHIFT / 2 ** zoom
+    xmin, ymin, xmax, ymax = bounds
+    return (int((xmin + ORIGIN_SHIFT) // size), int((xmax + ORIGIN_SHIFT) // size),
+            int((ORIGIN_SHIFT - ymax) // size), int((ORIGIN_SHIFT - ymin) // size))
+
+
+def render_tile(tree, palette_index, zoom, x, y):
+    """Paletbeeld van één tegel: per pixel de kleur van de buurt onder het pixelmidden."""
+    resolution = 2 * ORIGIN_SHIFT / 2 ** zoom / TILE_SIZE
+    offsets = (np.arange(TILE_SIZE) + 0.5) * resolution
+    px, py = np.meshgrid(-ORIGIN_SHIFT + x * TILE_SIZE * resolution + offsets,
+                         ORIGIN_SHIFT - y * TILE_SIZE * resolution - offsets)
+    pixel_idx, geom_idx = tree.query(shapely.points(px.ravel(), py.ravel()), predicate="intersects")
+    owner = np.full(px.size, -1)
+    owner[pixel_idx] = geom_idx
+    owner = owner.reshape(TILE_SIZE, TILE_SIZE)
+    if (owner < 0).all():
+        return None
+
+    border = np.zeros_like(owner, dtype=bool)
+    border[:, 1:] |= owner[:, 1:] != owner[:, :-1]
+    border[1:, :] |= owner[1:, :] != owner[:-1, :]
+
+    # Palet: 0 = doorzichtig, 1 = rand, daarna de vulkleuren
+    pixels = np.where(owner >= 0, palette_index[owner] + 2, 0)
+    pixels[border & (owner >= 0)] = 1
+    return pixels.astype(np.uint8)
+
+
+def render_zoom(layer, zoom, wkb, palette_index, colors, out_dir=TILES_DIR):
+    """Rendert alle tegels van één laag op één zoomniveau; geeft het aantal geschreven tegels."""
+    geoms = shapely.from_wkb(wkb)
+    tree = shapely.STRtree(geoms)
+    palette = [0, 0, 0, 0, 0, 0] + [int(c * 255) for color in colors for c in to_rgb(color)]
+    alpha = bytes([0, BORDER_ALPHA] + [255] * len(colors))
+
+    x0, x1, y0, y1 = tile_range(shapely.total_bounds(geoms), zoom)
+    written = 0
+    for x in range(x0, x1 + 1):
+        for y in range(y0, y1 + 1):
+            pixels = render_tile(tree, palette_index, zoom, x, y)
+            if pixels is None:
+                continue
+            image = Image.fromarray(pixels, mode="P")
+            image.putpalette(palette)
+            path = os.path.join(out_dir, layer, str(zoom), str(x), f"{y}.png")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            image.save(path, transparency=alpha, optimize=True)
+            written += 1
+    return written
+
+
+def build_tiles(layers=None, zooms=range(10, 15), workers=None, out_dir=TILES_DIR):
+    """Bouwt de tegels van `layers` voor alle `zooms`, parallel per (laag, zoom).
+
+    De map van een laag wordt eerst leeggemaakt: lege tegels worden niet
+    geschreven, dus anders bleven tegels van een eerdere run staan.
+    """
+    layers = layers or list(LAYERS)
+    version = map_data_version()
+    jobs = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for layer in layers:
+            shutil.rmtree(os.path.join(out_dir, layer), ignore_errors=True)
+            gdf, colors = LAYERS[layer]()
+            unique, palette_index = np.unique(np.asarray(colors, dtype=str), return_inverse=True)
+            wkb = shapely.to_wkb(np.asarray(gdf.to_crs("EPSG:3857").geometry.values))
+            for zoom in zooms:
+                future = pool.submit(render_zoom, layer, zoom, wkb, palette_index, list(unique), out_dir)
+                jobs[future] = (layer, zoom)
+        counts = {job: future.result() for future, job in jobs.items()}
+
+    for layer in layers:
+        with open(os.path.join(out_dir, layer, "meta.json"), "w") as f:
+            json.dump({"zooms": list(zooms), "version": version}, f)
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render de tegelpiramides van de buurtkaarten.")
+    parser.add_argument("layers", nargs="*", help="lagen om te renderen: " + ", ".join(LAYERS))
+    parser.add_argument("--min-zoom", type=int, default=10)
+    parser.add_argument("--max-zoom", type=int, default=14)
+    parser.add_argument("--workers", type=int, default=None, help="aantal processen (standaard: alle kernen)")
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.layers if name not in LAYERS]
+    if unknown:
+        parser.error("onbekende laag/lagen: " + ", ".join(unknown))
+
+    counts = build_tiles(args.layers, range(args.min_zoom, args.max_zoom + 1), args.workers)
+    for (layer, zoom), count in sorted(counts.items()):
+        print(f"{layer:<20} zoom {zoom:>2}  {count:5d} tegels")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Eigen weging van de Duurzaamheidsindex in de app.
+
+De genormaliseerde componenten staan één keer in een matrix (buurten x
+componenten); een nieuwe weging is dan één matrix-vectorproduct. De
+kleuren van de indexkaart worden in Python bepaald en als kleine tabel
+Buurtcode -> kleur naar de al geladen kaart gestuurd: de kaart zelf wordt
+niet opnieuw gebouwd of geladen (zie `bridge.push_colors`).
+"""
+
+import numpy as np
+
+from constants import INDEX_WEIGHTS
+from maps import choropleth_bins, step_colors
+
+# Component -> (label in de app, standaardgewicht)
+COMPONENTS = {
+    "Groeneaanbod_normalized": ("Groenaanbod", INDEX_WEIGHTS["Groeneaanbod_normalized"]),
+    "Aardgasvrije_normalized": ("Aardgasvrije woningen", INDEX_WEIGHTS["Aardgasvrije_normalized"]),
+    "Zonnepanelen_normalized": ("Zonnepanelen", INDEX_WEIGHTS["Zonnepanelen_normalized"]),
+    "Warmtepompen_normalized": ("Warmtepompenergie", 0.0),
+    "Energielabel_AB_normalized": ("Energielabel A++++ t/m B", 0.0),
+}
+
+# Som van de standaardgewichten; elke weging wordt hierop geschaald, zodat
+# de index in hetzelfde bereik blijft en de legenda van de kaart klopt
+WEIGHT_TOTAL = sum(default for _, default in COMPONENTS.values())
+
+# Zelfde klassen en kleuren als de choropleth van de indexkaart
+N_BINS = 6
+FILL_COLOR = "YlGn"
+
+
+def index_components(buurten, energielabels):
+    """Matrix met de genormaliseerde componenten, één rij per buurt in `buurten`.
+
+    Warmtepompenergie wordt net als de zonnepanelen door het maximum
+    gedeeld, het aandeel A-labels door 100. Buurten zonder labelaandeel
+    krijgen de mediaan.
+    """
+    share = buurten[["Buurtcode"]].merge(
+        energielabels[["Buurtcode", "Energielabel A++++ t/m B (%)"]], on="Buurtcode", how="left"
+    )["Energielabel A++++ t/m B (%)"].to_numpy(dtype=float)
+    share = np.where(np.isnan(share), np.nanmedian(share), share)
+    wp = buurten["hoeveelheid_wp_energie"].to_numpy(dtype=float)
+    columns = {
+        "Groeneaanbod_normalized": buurten["Groeneaanbod_normalized"].to_numpy(dtype=float),
+        "Aardgasvrije_normalized": buurten["Aardgasvrije_normalized"].to_numpy(dtype=float),
+        "Zonnepanelen_normalized": buurten["Zonnepanelen_normalized"].to_numpy(dtype=float),
+        "Warmtepompen_normalized": wp / wp.max(),
+        "Energielabel_AB_normalized": share / 100,
+    }
+    return np.column_stack([columns[name] for name in COMPONENTS])
+
+
+def weighted_index(components, weights):
+    """De index voor alle buurten bij relatieve gewichten `weights` (volgorde van `COMPONENTS`)."""
+    weights = np.asarray(weights, dtype=float)
+    if weights.sum() <= 0:
+        weights = np.array([default for _, default in COMPONENTS.values()])
+    return components @ (weights * WEIGHT_TOTAL / weights.sum())
+
+
+def index_bins(index):
+    """Klassengrenzen zoals de choropleth van de indexkaart ze kiest."""
+    return choropleth_bins(index, N_BINS)
+
+
+def index_colors(index, bins):
+    """Kleur per buurt voor de klassen `bins`; waarden buiten het bereik krijgen de uiterste klasse."""
+    return step_colors(index, bins, FILL_COLOR)